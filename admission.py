@@ -0,0 +1,163 @@
+import os
+import time
+import uuid
+import threading
+from collections import deque
+
+from metrics import inc, register_health
+
+
+# Admission configuration: submissions per second and burst size per upstream endpoint
+ADMISSION_LIMITS = {
+    'public_advton': (
+        float(os.environ.get('ADVTON_SUBMIT_RATE', '2')),
+        int(os.environ.get('ADVTON_SUBMIT_BURST', '5')),
+    ),
+    'public_comfyui': (
+        float(os.environ.get('COMFYUI_SUBMIT_RATE', '1')),
+        int(os.environ.get('COMFYUI_SUBMIT_BURST', '3')),
+    ),
+}
+# Requests waiting per endpoint beyond which new ones are shed
+ADMISSION_MAX_WAITING = int(os.environ.get('ADMISSION_MAX_WAITING', '100'))
+
+
+class TokenBucket:
+    """Classic token bucket; not thread-safe, callers hold the controller lock"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def take(self):
+        """Take a token if one is available, otherwise return seconds until the next one"""
+        now = time.monotonic()
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate > 0 else 1.0
+
+
+class AdmissionController:
+    """Process-wide gate in front of the upstream submit endpoints
+
+    Each endpoint has a token bucket and a bounded FIFO of waiting requests.
+    A request is started as soon as it reaches the head of its queue and a
+    token is available; once the queue is full, new requests are shed.
+    Start callbacks run on the dispatcher thread and must not block.
+    """
+
+    def __init__(self, limits, max_waiting):
+        self.max_waiting = max_waiting
+        self.buckets = {endpoint: TokenBucket(rate, burst) for endpoint, (rate, burst) in limits.items()}
+        self.queues = {endpoint: deque() for endpoint in limits}
+        self.tickets = {}
+        self.cond = threading.Condition()
+        self.dispatcher = None
+
+    def admit(self, endpoint, start):
+        """Queue start() behind the endpoint's rate limit
+
+        Returns a ticket id for queue_position(), or None if the request was
+        shed because too many are already waiting. Endpoints without a limit
+        are started immediately.
+        """
+        ticket = uuid.uuid4().hex
+        with self.cond:
+            queue = self.queues.get(endpoint)
+            if queue is None:
+                run_now = True
+            elif not queue and self.buckets[endpoint].take() == 0:
+                run_now = True
+            elif len(queue) >= self.max_waiting:
+                inc('admission_total', endpoint=endpoint, outcome='shed')
+                return None
+            else:
+                run_now = False
+                queue.append((ticket, start))
+                self.tickets[ticket] = endpoint
+                self._ensure_dispatcher()
+                self.cond.notify()
+
+        inc('admission_total', endpoint=endpoint, outcome='admitted' if run_now else 'queued')
+        if run_now:
+            start()
+        return ticket
+
+    def queue_position(self, ticket):
+        """Return (position, waiting) for a queued ticket, or None once it has started"""
+        with self.cond:
+            endpoint = self.tickets.get(ticket)
+            if endpoint is None:
+                return None
+            queue = self.queues[endpoint]
+            for i, (queued_ticket, _) in enumerate(queue):
+                if queued_ticket == ticket:
+                    return i + 1, len(queue)
+            return None
+
+    def stats(self):
+        """Waiting requests and available tokens per endpoint, for monitoring"""
+        with self.cond:
+            return {
+                endpoint: {
+                    'waiting': len(self.queues[endpoint]),
+                    'tokens': round(bucket.tokens, 2),
+                    'rate': bucket.rate,
+                    'burst': bucket.burst,
+                }
+                for endpoint, bucket in self.buckets.items()
+            }
+
+    def _ensure_dispatcher(self):
+        if self.dispatcher is None:
+            self.dispatcher = threading.Thread(target=self._dispatch_loop, name="outfit-admission", daemon=True)
+            self.dispatcher.start()
+
+    def _dispatch_loop(self):
+        while True:
+            ready = []
+            with self.cond:
+                wait_s = None
+                for endpoint, queue in self.queues.items():
+                    while queue:
+                        delay = self.buckets[endpoint].take()
+                        if delay > 0:
+                            wait_s = delay if wait_s is None else min(wait_s, delay)
+                            break
+                        ticket, start = queue.popleft()
+                        del self.tickets[ticket]
+                        ready.append(start)
+                if not ready:
+                    self.cond.wait(wait_s)
+
+            for start in ready:
+                try:
+                    start()
+                except Exception as e:
+                    print(f"Admission start error: {e}")
+
+
+_controller = AdmissionController(ADMISSION_LIMITS, ADMISSION_MAX_WAITING)
+
+
+def admit(endpoint, start):
+    return _controller.admit(endpoint, start)
+
+
+def queue_position(ticket):
+    return _controller.queue_position(ticket) if ticket else None
+
+
+def admission_stats():
+    return _controller.stats()
+
+
+register_health('admission', admission_stats)
@@ -1,10 +1,24 @@
+import time
+from startup_profile import mark, report_startup
+mark('script_start')
+render_started_at = time.perf_counter()
+
 import streamlit as st
 import cv2
 import os
-import time
-import random
 from utils import *
-# CRITICAL: Set OpenCV threading to single thread BEFORE importing MTCNN
+from face_check import validate_pose_image
+from thumbnails import get_thumbnail
+import hashlib
+from image_prep import normalize_pose_image, normalize_pose_bytes
+from gallery import render_gallery_picker
+from metrics import observe, start_metrics_exporter
+from storage import lease_files, start_storage_sweeper
+from jobs import (
+    submit_tryon_job, submit_pose_change_job, submit_batch_tryon, get_job, get_batch,
+    is_job_active, is_batch_active, resume_jobs, SUCCEED, TIMEOUT, FINISHED_STATES,
+)
+# CRITICAL: Set OpenCV threading to single thread BEFORE loading the face detector
 cv2.setNumThreads(0)
 os.environ["OMP_NUM_THREADS"] = "1"
 os.environ["OPENBLAS_NUM_THREADS"] = "1"
@@ -12,8 +26,10 @@ os.environ["MKL_NUM_THREADS"] = "1"
 os.environ["VECLIB_MAXIMUM_THREADS"] = "1"
 os.environ["NUMEXPR_NUM_THREADS"] = "1"
 
-from mtcnn.mtcnn import MTCNN
+# Heavy detector imports (MTCNN/TensorFlow) happen only when the model is built
+from face_detectors import get_shared_face_detector, warm_face_detector_async, FACE_DETECTOR_WARMUP
 from streamlit_utils import *
+mark('imports_done')
 
 # Page config
 st.set_page_config(
@@ -22,175 +38,110 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Initialize face detector ONCE using session state
-@st.cache_resource
-def get_face_detector():
-    """Initialize face detector once and cache it"""
-    return MTCNN()
+# Seconds between progress refreshes while a background job is running
+JOB_REFRESH_S = 1
+BATCH_GRID_COLUMNS = 4
+BATCH_MAX_ITEMS = 12
 
-face_detector = get_face_detector()
 
+def track_job(state_key, job_id):
+    """Remember a job in session state and in the URL, so a reconnecting tab can reattach"""
+    st.session_state[state_key] = job_id
+    if job_id:
+        st.query_params[state_key] = job_id
+    else:
+        st.query_params.pop(state_key, None)
 
-# Define processing functions at module level (before they're called)
-def process_tryon(cloth_image, pose_image, high_resolution, client_ip):
-    """Process virtual try-on request"""
-    pose_id = os.path.basename(pose_image).split(".")[0]
-    cloth_id = int(os.path.basename(cloth_image).split(".")[0])
-    
-    progress_placeholder = st.empty()
-    status_placeholder = st.empty()
-    
-    try:
-        with progress_placeholder:
-            progress_bar = st.progress(0)
-        
-        status_placeholder.text("⏳ Uploading image...")
-        progress_bar.progress(10)
-        
-        timeId = int(str(time.time()).replace(".", "")) + random.randint(1000, 9999)
-        upload_url = upload_pose_img(client_ip, timeId, pose_image)
-        
-        if len(upload_url) == 0:
-            status_placeholder.error("❌ Failed to upload image")
-            return
-        
-        status_placeholder.text("🔄 Submitting task...")
-        progress_bar.progress(30)
-        
-        if high_resolution:
-            public_res = publicClothSwap(upload_url, cloth_id, is_hr=1)
+
+def apply_job_result(job):
+    """Copy a finished job's outcome into session state"""
+    if job['kind'] == 'tryon':
+        track_job('tryon_job', None)
+        if job['status'] == SUCCEED:
+            st.session_state.result_image = job['result'][0] if job['result'] else None
+            st.session_state.info_text = job['info']
         else:
-            public_res = publicClothSwap(upload_url, cloth_id, is_hr=0)
-        
-        if public_res is None:
-            status_placeholder.error("❌ Failed to submit task")
-            return
-        
-        status_placeholder.text(f"⏳ Processing... Task ID: {public_res['id']}")
-        progress_bar.progress(50)
-        
-        # Check if mid_result is accessible
-        mid_result = public_res['mid_result'] if is_http_resource_accessible(public_res['mid_result']) else None
-        
-        max_try = 120 * 3
-        wait_s = 0.5
-        for i in range(max_try):
-            time.sleep(wait_s)
-            state = getInfRes(public_res['id'])
-            
-            progress = min(50 + (i / max_try) * 45, 95)
-            progress_bar.progress(int(progress))
-            
-            if state is None:
-                status_placeholder.text("⚠️ Task query failed, retrying...")
-            elif state['status'] == 'PROCESSING':
-                status_placeholder.text(f"🔄 Processing... Query {i}")
-            elif state['status'] == 'SUCCEED':
-                timestamp = int(time.time() * 1000)
-                result_image = state['output1'] + f"?t={timestamp}"
-                
-                # Download result image locally
-                local_result = download_result_image(result_image)
-                
-                st.session_state.result_image = local_result
-                st.session_state.info_text = f"✅ Task finished! {state['msg']}"
-                
-                progress_bar.progress(100)
-                status_placeholder.success("✅ Virtual try-on completed successfully!")
-                time.sleep(1)
-                st.rerun()
-                return
-            elif state['status'] == 'FAILED':
-                status_placeholder.error(f"❌ Task failed: {state['msg']}")
-                return
-        
-        status_placeholder.warning("⏰ Task timeout. Please try again.")
-        
-    except Exception as e:
-        status_placeholder.error(f"❌ Processing exception: {str(e)}")
-        import traceback
-        st.error(traceback.format_exc())
+            st.session_state.tryon_notice = (job['status'], job['message'])
+    else:
+        track_job('pose_job', None)
+        if job['status'] == SUCCEED:
+            st.session_state.pose_results = job['result']
+            st.session_state.pose_info = job['info']
+        else:
+            st.session_state.pose_notice = (job['status'], job['message'])
 
 
-def process_pose_change(pose_prompt, pose_changer_image, token):
-    """Process pose change request"""
-    progress_placeholder = st.empty()
-    status_placeholder = st.empty()
-    
-    try:
-        with progress_placeholder:
-            progress_bar = st.progress(0)
-        
-        client_ip = get_client_ip()
-        
-        status_placeholder.text("⏳ Uploading image...")
-        progress_bar.progress(20)
-        
-        # Upload image if it's a local file
-        if isinstance(pose_changer_image, str) and not pose_changer_image.startswith('http'):
-            timeId = int(str(time.time()).replace(".", "")) + random.randint(1000, 9999)
-            image_url = upload_pose_img(client_ip, timeId, pose_changer_image)
-            if not image_url:
-                status_placeholder.error("❌ Image upload failed!")
-                return
-        else:
-            image_url = pose_changer_image
-        
-        status_placeholder.text("🔄 Submitting pose change request...")
-        progress_bar.progress(40)
-        
-        pose_result = public_pose_changer(image_url, pose_prompt)
-        if pose_result is None:
-            status_placeholder.error("❌ Pose change request failed!")
-            return
-        
-        status_placeholder.text(f"⏳ Processing... Task ID: {pose_result['id']}")
-        progress_bar.progress(60)
-        
-        max_try = 120
-        wait_s = 1
-        for i in range(max_try):
-            time.sleep(wait_s)
-            result = get_pose_changer_res(pose_result['id'])
-            
-            progress = min(60 + (i / max_try) * 35, 95)
-            progress_bar.progress(int(progress))
-            
-            if result is None:
-                continue
-            elif result['status'] == 'PROCESSING':
-                status_placeholder.text(f"🔄 Processing... Query {i}")
-                continue
-            elif result['status'] == 'SUCCEED':
-                # Extract output images
-                output_images = []
-                for j in range(1, 4):
-                    output_key = f'output{j}'
-                    if output_key in result and result[output_key] and result[output_key].strip():
-                        timestamp = int(time.time() * 1000)
-                        img_url = result[output_key] + f"?t={timestamp}"
-                        local_img = download_result_image(img_url, f"pose_result_{j}_{int(time.time())}.jpg")
-                        if local_img:
-                            output_images.append(local_img)
-                
-                st.session_state.pose_results = output_images
-                st.session_state.pose_info = f"✅ Pose change completed! {result.get('msg', '')}"
-                
-                progress_bar.progress(100)
-                status_placeholder.success("✅ Pose change completed successfully!")
-                time.sleep(1)
-                st.rerun()
-                return
-            elif result['status'] == 'FAILED':
-                status_placeholder.error(f"❌ Pose change failed: {result.get('msg', '')}")
-                return
-        
-        status_placeholder.warning("⏰ Pose change timeout!")
-        
-    except Exception as e:
-        status_placeholder.error(f"❌ Processing exception: {str(e)}")
-        import traceback
-        st.error(traceback.format_exc())
+@st.fragment(run_every=JOB_REFRESH_S)
+def show_job_progress(state_key):
+    """Reattach to the job stored under state_key and render its progress"""
+    job = get_job(st.session_state[state_key])
+    if job is None:
+        # Job expired and its results are gone; nothing to reattach to
+        track_job(state_key, None)
+        st.rerun()
+    if job['status'] in FINISHED_STATES:
+        apply_job_result(job)
+        st.rerun()
+
+    st.progress(job['progress'])
+    st.text(job['message'])
+
+
+def render_batch(batch):
+    """Render a batch as a grid of finished results with per-item latency"""
+    st.progress(int(100 * batch['done'] / max(batch['total'], 1)))
+    st.text(f"{batch['message']} {batch['done']}/{batch['total']} done in {batch['elapsed']:.1f}s")
+    lease_files([item['result'][0] for item in batch['items'] if item['result']])
+    cols = st.columns(BATCH_GRID_COLUMNS)
+    for idx, item in enumerate(batch['items']):
+        with cols[idx % BATCH_GRID_COLUMNS]:
+            label = f"Cloth {item['cloth_id']}"
+            if item['status'] == SUCCEED and item['result'] and os.path.exists(item['result'][0]):
+                latency = f" · {item['latency']:.1f}s" if item['latency'] is not None else ""
+                st.image(get_thumbnail(item['result'][0]), caption=f"{label}{latency}", use_container_width=True)
+            elif item['status'] in FINISHED_STATES:
+                st.caption(f"{label}: {item['message']}")
+            else:
+                st.caption(f"{label}: ⏳ {item['status'].lower()}")
+
+
+@st.fragment(run_every=JOB_REFRESH_S)
+def show_batch_progress():
+    """Stream batch results into the grid as they complete"""
+    batch = get_batch(st.session_state.batch_job)
+    if batch is None:
+        st.session_state.batch_job = None
+        st.rerun()
+    if batch['finished']:
+        # Switch to the static render so the fragment stops refreshing
+        st.rerun()
+    render_batch(batch)
+
+
+def get_upload_buffer(uploaded_file, slot):
+    """Return (sha1, bytes) of an uploaded file, held in memory once per session
+
+    Reruns reuse the buffer and its hash instead of rewriting the upload to
+    disk; a new upload in the same slot replaces the old buffer.
+    """
+    buffer = st.session_state.upload_buffers.get(slot)
+    if buffer is None or buffer['file_id'] != uploaded_file.file_id:
+        data = uploaded_file.getvalue()
+        buffer = {'file_id': uploaded_file.file_id, 'sha1': hashlib.sha1(data).hexdigest(), 'data': data}
+        st.session_state.upload_buffers[slot] = buffer
+    return buffer['sha1'], buffer['data']
+
+
+def show_job_notice(notice_key):
+    """Render the failure/timeout message left by the last finished job"""
+    notice = st.session_state[notice_key]
+    if notice is None:
+        return
+    status, message = notice
+    if status == TIMEOUT:
+        st.warning(message)
+    else:
+        st.error(message)
 
 
 # Title and description
@@ -207,6 +158,34 @@ if 'pose_results' not in st.session_state:
     st.session_state.pose_results = []
 if 'pose_info' not in st.session_state:
     st.session_state.pose_info = ""
+if 'tryon_job' not in st.session_state:
+    st.session_state.tryon_job = None
+if 'pose_job' not in st.session_state:
+    st.session_state.pose_job = None
+if 'tryon_notice' not in st.session_state:
+    st.session_state.tryon_notice = None
+if 'pose_notice' not in st.session_state:
+    st.session_state.pose_notice = None
+if 'batch_job' not in st.session_state:
+    st.session_state.batch_job = None
+if 'upload_buffers' not in st.session_state:
+    st.session_state.upload_buffers = {}
+
+# Resume jobs a previous process left unfinished, then reattach a reconnecting
+# tab to the jobs recorded in its URL
+resume_jobs()
+for state_key in ('tryon_job', 'pose_job'):
+    if st.session_state[state_key] is None and st.query_params.get(state_key):
+        st.session_state[state_key] = st.query_params[state_key]
+
+# Jobs run in the background; a session is busy while one of its jobs is still active
+st.session_state.processing = (
+    is_job_active(st.session_state.tryon_job)
+    or is_job_active(st.session_state.pose_job)
+    or is_batch_active(st.session_state.batch_job)
+)
+# Keep the files this session still shows safe from the storage sweeper
+lease_files([st.session_state.result_image, *st.session_state.pose_results])
 
 # Sidebar for settings
 with st.sidebar:
@@ -216,9 +195,9 @@ with st.sidebar:
     st.markdown("### 📖 Upload Tips")
     tip1, tip2 = get_tips()
     if os.path.exists(tip1):
-        st.image(tip1, caption="Tip 1", use_container_width=True)
+        st.image(get_thumbnail(tip1, 'sm'), caption="Tip 1", use_container_width=True)
     if os.path.exists(tip2):
-        st.image(tip2, caption="Tip 2", use_container_width=True)
+        st.image(get_thumbnail(tip2, 'sm'), caption="Tip 2", use_container_width=True)
 
 # Main content area
 tab1, tab2 = st.tabs(["🎯 Virtual Try-On", "🎭 Pose Changer"])
@@ -230,6 +209,8 @@ with tab1:
         st.subheader("1️⃣ Choose Clothing")
         cloth_examples = get_cloth_examples(hr=0)
         cloth_hr_examples = get_cloth_examples(hr=1)
+        batch_mode = False
+        batch_cloth_images = []
         
         if len(cloth_examples) == 0 and len(cloth_hr_examples) == 0:
             st.error("❌ No clothing examples found. Please ensure 'Datas/ClothImgs' directory exists with images.")
@@ -238,24 +219,35 @@ with tab1:
             cloth_option = st.radio("Clothing Type:", ["Standard", "Premium"])
             
             if cloth_option == "Standard" and len(cloth_examples) > 0:
-                selected_cloth_idx = st.selectbox(
-                    "Select a clothing item:",
-                    range(len(cloth_examples)),
-                    format_func=lambda x: f"Cloth {os.path.basename(cloth_examples[x]).split('.')[0]}"
-                )
-                cloth_image = cloth_examples[selected_cloth_idx]
+                st.markdown("Select a clothing item:")
+                cloth_image = render_gallery_picker(cloth_examples, key="cloth_gallery", columns=3,
+                                                    content_hashes=get_cloth_hashes())
             elif len(cloth_hr_examples) > 0:
-                selected_cloth_idx = st.selectbox(
-                    "Select a premium clothing item:",
-                    range(len(cloth_hr_examples)),
-                    format_func=lambda x: f"Cloth {os.path.basename(cloth_hr_examples[x]).split('.')[0]}"
-                )
-                cloth_image = cloth_hr_examples[selected_cloth_idx]
+                st.markdown("Select a premium clothing item:")
+                cloth_image = render_gallery_picker(cloth_hr_examples, key="cloth_hr_gallery", columns=3,
+                                                    content_hashes=get_cloth_hashes())
             else:
                 cloth_image = None
             
             if cloth_image and os.path.exists(cloth_image):
-                st.image(cloth_image, caption="Selected Clothing", use_container_width=True)
+                st.image(get_thumbnail(cloth_image, content_hash=get_cloth_hashes().get(cloth_image)),
+                         caption="Selected Clothing", use_container_width=True)
+            
+            # Batch mode: one photo against several garments of the current tier
+            batch_mode = st.checkbox("🧺 Try on several items at once")
+            if batch_mode:
+                tier_examples = cloth_examples if cloth_option == "Standard" else cloth_hr_examples
+                batch_key = f"batch_items_{cloth_option}"
+                # Seed with the selected item only once; later gallery clicks keep the selection
+                if not st.session_state.get(batch_key) and cloth_image in tier_examples:
+                    st.session_state[batch_key] = [cloth_image]
+                batch_cloth_images = st.multiselect(
+                    "Items to try on:",
+                    list(tier_examples),
+                    key=batch_key,
+                    format_func=lambda path: f"Cloth {os.path.basename(path).split('.')[0]}",
+                    max_selections=BATCH_MAX_ITEMS,
+                )
     
     with col2:
         st.subheader("2️⃣ Choose/Upload Photo")
@@ -265,29 +257,32 @@ with tab1:
         if pose_source == "Example Photos":
             pose_examples = get_pose_examples()
             if len(pose_examples) > 0:
-                selected_pose_idx = st.selectbox(
-                    "Select a pose:",
-                    range(len(pose_examples)),
-                    format_func=lambda x: f"Pose {os.path.basename(pose_examples[x]).split('.')[0]}"
+                st.markdown("Select a pose:")
+                # Many example names share long camera/screenshot prefixes, so number them instead
+                pose_numbers = {path: i for i, path in enumerate(pose_examples, 1)}
+                pose_image = render_gallery_picker(
+                    pose_examples,
+                    key="pose_gallery",
+                    format_label=lambda path: f"Pose {pose_numbers[path]}",
+                    columns=3,
+                    content_hashes=get_pose_hashes(),
                 )
-                pose_image = pose_examples[selected_pose_idx]
+                # One canonical, resized artifact feeds face validation, upload and preview
+                pose_image = normalize_pose_image(pose_image, 1 if high_resolution else 0)
             else:
                 st.warning("No pose examples found in 'Datas/PoseImgs' directory.")
                 pose_image = None
         else:
             uploaded_file = st.file_uploader("Upload your photo", type=['jpg', 'jpeg', 'png'])
             if uploaded_file is not None:
-                # Save uploaded file temporarily
-                temp_dir = "tmp"
-                os.makedirs(temp_dir, exist_ok=True)
-                pose_image = os.path.join(temp_dir, f"uploaded_{int(time.time())}.jpg")
-                with open(pose_image, "wb") as f:
-                    f.write(uploaded_file.getbuffer())
+                content_hash, data = get_upload_buffer(uploaded_file, 'tryon')
+                pose_image = normalize_pose_bytes(data, 1 if high_resolution else 0, content_hash)
             else:
                 pose_image = None
+        lease_files([pose_image])
         
         if pose_image and os.path.exists(pose_image):
-            st.image(pose_image, caption="Selected/Uploaded Photo", use_container_width=True)
+            st.image(get_thumbnail(pose_image), caption="Selected/Uploaded Photo", use_container_width=True)
     
     with col3:
         st.subheader("3️⃣ Generate Result")
@@ -295,39 +290,41 @@ with tab1:
         if st.button("🚀 Run Virtual Try-On", type="primary", use_container_width=True, disabled=st.session_state.processing):
             if pose_image is None:
                 st.error("❌ No pose image found! Please select or upload a photo.")
-            elif cloth_image is None:
+            elif cloth_image is None and not batch_cloth_images:
                 st.error("❌ No cloth image found! Please select a clothing item.")
+            elif batch_mode and not batch_cloth_images:
+                st.error("❌ Please select at least one clothing item for batch try-on.")
             else:
                 # Validate face detection
                 try:
-                    pose_np = cv2.imread(pose_image)
-                    if pose_np is None:
-                        st.error("❌ Failed to read image. Please try another image.")
+                    face_ok, face_msg = validate_pose_image(get_shared_face_detector(), pose_image)
+                    if not face_ok:
+                        st.error(face_msg)
                     else:
-                        faces = face_detector.detect_faces(pose_np[:,:,::-1])
-                        
-                        if len(faces) == 0:
-                            st.error("❌ Fatal Error! No face detected! You must upload a human photo, not a clothing photo!")
+                        # Check region (optional - you can remove this if not needed)
+                        client_ip = get_client_ip()
+                        if not check_region_warp(client_ip):
+                            st.error("❌ Failed! Our server is under maintenance, please try again later.")
+                        elif batch_mode:
+                            cloth_ids = [int(os.path.basename(path).split(".")[0]) for path in batch_cloth_images]
+                            st.session_state.batch_job = submit_batch_tryon(
+                                pose_image, cloth_ids, 1 if high_resolution else 0, client_ip
+                            )
+                            st.rerun()
                         else:
-                            x, y, w, h = faces[0]["box"]
-                            H, W = pose_np.shape[:2]
-                            max_face_ratio = 1/3.3
-                            
-                            if w/W > max_face_ratio or h/H > max_face_ratio:
-                                st.error("❌ Fatal Error! Headshot is not allowed! You must upload a full-body or half-body photo!")
-                            else:
-                                # Check region (optional - you can remove this if not needed)
-                                client_ip = get_client_ip()
-                                if not check_region_warp(client_ip):
-                                    st.error("❌ Failed! Our server is under maintenance, please try again later.")
-                                else:
-                                    # Process the request
-                                    st.session_state.processing = True
-                                    process_tryon(cloth_image, pose_image, high_resolution, client_ip)
-                                    st.session_state.processing = False
+                            # Hand the request to the background job engine
+                            cloth_id = int(os.path.basename(cloth_image).split(".")[0])
+                            st.session_state.tryon_notice = None
+                            track_job('tryon_job', submit_tryon_job(
+                                pose_image, cloth_id, 1 if high_resolution else 0, client_ip
+                            ))
+                            st.rerun()
                 except Exception as e:
                     st.error(f"❌ Error processing image: {str(e)}")
-                    st.session_state.processing = False
+        
+        if st.session_state.tryon_job:
+            show_job_progress('tryon_job')
+        show_job_notice('tryon_notice')
         
         # Display processing info and results
         if st.session_state.info_text:
@@ -335,7 +332,8 @@ with tab1:
         
         if st.session_state.result_image:
             if isinstance(st.session_state.result_image, str) and os.path.exists(st.session_state.result_image):
-                st.image(st.session_state.result_image, caption="Result Image", use_container_width=True)
+                # Preview is a thumbnail; the download button below serves the full image
+                st.image(get_thumbnail(st.session_state.result_image, 'lg'), caption="Result Image", use_container_width=True)
                 
                 # Download button for result
                 with open(st.session_state.result_image, "rb") as file:
@@ -348,6 +346,19 @@ with tab1:
                     )
             else:
                 st.image(st.session_state.result_image, caption="Result Image", use_container_width=True)
+    
+    if st.session_state.batch_job:
+        st.markdown("#### 🧺 Batch Results")
+        if is_batch_active(st.session_state.batch_job):
+            show_batch_progress()
+        else:
+            batch = get_batch(st.session_state.batch_job)
+            if batch is None:
+                st.session_state.batch_job = None
+            elif batch['status'] == SUCCEED:
+                render_batch(batch)
+            else:
+                st.error(batch['message'])
 
 with tab2:
     st.subheader("🎭 AI Pose Changer")
@@ -362,17 +373,18 @@ with tab2:
         pose_uploaded = st.file_uploader("Upload image for pose change", type=['jpg', 'jpeg', 'png'], key="pose_upload")
         
         if pose_uploaded is not None:
-            temp_dir = "tmp"
-            os.makedirs(temp_dir, exist_ok=True)
-            pose_changer_image = os.path.join(temp_dir, f"pose_source_{int(time.time())}.jpg")
-            with open(pose_changer_image, "wb") as f:
-                f.write(pose_uploaded.getbuffer())
-            st.image(pose_changer_image, use_container_width=True)
+            content_hash, data = get_upload_buffer(pose_uploaded, 'pose_change')
+            pose_changer_image = normalize_pose_bytes(data, 1, content_hash)
+            lease_files([pose_changer_image])
+            if pose_changer_image:
+                st.image(get_thumbnail(pose_changer_image), use_container_width=True)
+            else:
+                st.error("❌ Failed to read image. Please try another image.")
         else:
             # Use result from try-on if available
             if st.session_state.result_image and isinstance(st.session_state.result_image, str) and os.path.exists(st.session_state.result_image):
                 pose_changer_image = st.session_state.result_image
-                st.image(pose_changer_image, caption="Using try-on result", use_container_width=True)
+                st.image(get_thumbnail(pose_changer_image), caption="Using try-on result", use_container_width=True)
             else:
                 pose_changer_image = None
                 st.info("Please upload an image or run virtual try-on first")
@@ -392,9 +404,13 @@ with tab2:
             elif pose_changer_image is None:
                 st.error("❌ Please provide source image first!")
             else:
-                st.session_state.processing = True
-                process_pose_change(pose_prompt, pose_changer_image, pose_token)
-                st.session_state.processing = False
+                st.session_state.pose_notice = None
+                track_job('pose_job', submit_pose_change_job(pose_prompt, pose_changer_image, get_client_ip()))
+                st.rerun()
+        
+        if st.session_state.pose_job:
+            show_job_progress('pose_job')
+        show_job_notice('pose_notice')
     
     # Display pose change results
     if st.session_state.pose_info:
@@ -406,7 +422,7 @@ with tab2:
         for idx, (col, result_img) in enumerate(zip(cols, st.session_state.pose_results)):
             with col:
                 if result_img and os.path.exists(result_img):
-                    st.image(result_img, caption=f"Result {idx+1}", use_container_width=True)
+                    st.image(get_thumbnail(result_img), caption=f"Result {idx+1}", use_container_width=True)
 
 # Footer
 st.markdown("---")
@@ -418,3 +434,12 @@ st.markdown(
     """,
     unsafe_allow_html=True
 )
+mark('first_render')
+observe('stage_seconds', time.perf_counter() - render_started_at, stage='render')
+start_metrics_exporter()
+start_storage_sweeper()
+
+# Load the face detector only after the page is drawn, so cold starts render immediately
+if FACE_DETECTOR_WARMUP:
+    warm_face_detector_async()
+report_startup()
@@ -0,0 +1,62 @@
+"""Face detection latency per image size, full resolution vs. downscaled
+
+Run from the project root:
+
+    python -m benchmarks.bench_face_detect [--image PATH] [--repeat N]
+"""
+import os
+import time
+import argparse
+
+import cv2
+
+from face_check import detect_faces_scaled, FACE_DETECT_MAX_SIDE
+
+
+proj_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_IMAGE = os.path.join(proj_dir, 'Datas', 'Poseimgs', 'pose_0.jpg')
+LONG_SIDES = (640, 1024, 2048, 4000, 6000)
+
+
+def time_call(fn, repeat):
+    """Return the median wall time of fn() over repeat runs, in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--image', default=DEFAULT_IMAGE)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    from mtcnn.mtcnn import MTCNN
+    detector = MTCNN()
+
+    source = cv2.imread(args.image)
+    if source is None:
+        raise SystemExit(f"Cannot read {args.image}")
+    H, W = source.shape[:2]
+
+    print(f"{'size':>11} | {'full (ms)':>10} | {'scaled (ms)':>11} | faces")
+    for long_side in LONG_SIDES:
+        scale = long_side / float(max(H, W))
+        image = cv2.resize(source, (round(W * scale), round(H * scale)), interpolation=cv2.INTER_CUBIC)
+        rgb = image[:, :, ::-1].copy()
+
+        full_ms = time_call(lambda: detector.detect_faces(rgb), args.repeat)
+        scaled_ms = time_call(lambda: detect_faces_scaled(detector, image), args.repeat)
+        faces = len(detect_faces_scaled(detector, image))
+        size = f"{image.shape[1]}x{image.shape[0]}"
+        print(f"{size:>11} | {full_ms:>10.1f} | {scaled_ms:>11.1f} | {faces}")
+
+    print(f"Detection copy is capped at {FACE_DETECT_MAX_SIDE}px on the longest side")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""Accuracy/latency comparison of face detector backends over the pose examples
+
+Each backend's verdict (ok / no face / headshot) is compared against a
+reference backend, or against hand labels when --labels points to a JSON
+file mapping file names to "ok", "no_face" or "headshot".
+
+Run from the project root:
+
+    python -m benchmarks.compare_face_detectors [--backends mtcnn,haar,dnn] [--reference mtcnn]
+"""
+import os
+import json
+import time
+import argparse
+
+import cv2
+
+from face_check import detect_faces_scaled, check_faces, MSG_NO_FACE, MSG_HEADSHOT
+from face_detectors import create_face_detector, FACE_DETECTOR_BACKENDS
+
+
+proj_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_IMAGE_DIR = os.path.join(proj_dir, 'Datas', 'Poseimgs')
+
+
+def verdict_label(ok, message):
+    if ok:
+        return 'ok'
+    return {MSG_NO_FACE: 'no_face', MSG_HEADSHOT: 'headshot'}.get(message, 'error')
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def run_backend(detector, images):
+    """Return ({name: label}, [latency_ms]) for detector over images"""
+    labels, latencies = {}, []
+    for name, image in images:
+        start = time.perf_counter()
+        faces = detect_faces_scaled(detector, image)
+        latencies.append((time.perf_counter() - start) * 1000)
+        labels[name] = verdict_label(*check_faces(faces, image.shape))
+    return labels, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--image-dir', default=DEFAULT_IMAGE_DIR)
+    parser.add_argument('--backends', default=','.join(FACE_DETECTOR_BACKENDS))
+    parser.add_argument('--reference', default='mtcnn')
+    parser.add_argument('--labels', default=None)
+    args = parser.parse_args()
+
+    images = []
+    for f in sorted(os.listdir(args.image_dir)):
+        if '.jpg' not in f and '.png' not in f:
+            continue
+        image = cv2.imread(os.path.join(args.image_dir, f))
+        if image is not None:
+            images.append((f, image))
+    if not images:
+        raise SystemExit(f"No images found in {args.image_dir}")
+
+    results = {}
+    for backend in args.backends.split(','):
+        try:
+            detector = create_face_detector(backend)
+        except Exception as e:
+            print(f"Skipping {backend}: {e}")
+            continue
+        # Warm up once so model initialisation does not skew the first image
+        detect_faces_scaled(detector, images[0][1])
+        results[backend] = run_backend(detector, images)
+
+    if args.labels:
+        with open(args.labels) as f:
+            truth = json.load(f)
+        truth_name = os.path.basename(args.labels)
+    elif args.reference in results:
+        truth = results[args.reference][0]
+        truth_name = args.reference
+    else:
+        raise SystemExit(f"Reference backend '{args.reference}' did not run and no --labels given")
+
+    print(f"{len(images)} images, accuracy measured against {truth_name}")
+    print(f"{'backend':>8} | {'accuracy':>8} | {'mean ms':>8} | {'p50 ms':>7} | {'p95 ms':>7}")
+    for backend, (labels, latencies) in results.items():
+        scored = [name for name in labels if name in truth]
+        correct = sum(labels[name] == truth[name] for name in scored)
+        accuracy = correct / len(scored) if scored else 0.0
+        mean_ms = sum(latencies) / len(latencies)
+        print(f"{backend:>8} | {accuracy:>8.1%} | {mean_ms:>8.1f} | "
+              f"{percentile(latencies, 0.5):>7.1f} | {percentile(latencies, 0.95):>7.1f}")
+
+
+if __name__ == '__main__':
+    main()
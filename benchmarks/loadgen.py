@@ -0,0 +1,138 @@
+"""Load generator: N concurrent virtual users driving the try-on API functions
+
+Each virtual user repeatedly runs upload_pose_img -> publicClothSwap ->
+getInfRes polling -> download_result_image from utils.py and the run
+reports throughput plus p50/p95/p99 latency per stage. By default an
+in-process mock_server is started; pass --api-url to target another server.
+
+    python -m benchmarks.loadgen --users 20 --iterations 5 [--median-s 4] [--fail-rate 0.05]
+"""
+import os
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import utils
+import mock_server
+
+
+proj_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_POSE = os.path.join(proj_dir, 'Datas', 'Poseimgs', 'pose_0.jpg')
+STAGES = ('upload', 'submit', 'poll', 'download', 'total')
+
+
+def percentile(values, q):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def run_iteration(vu_id, iteration, pose_path, cloth_id, poll_interval_s, timeout_s):
+    """One try-on through the utils.py functions; returns a result record"""
+    record = {'ok': False, 'error': None, 'status_calls': 0}
+    start = time.perf_counter()
+
+    upload_url = utils.upload_pose_img(f"10.0.{vu_id}.{iteration}", int(time.time() * 1000), pose_path)
+    record['upload'] = time.perf_counter() - start
+    if not upload_url:
+        record['error'] = 'upload'
+        return record
+
+    t = time.perf_counter()
+    public_res = utils.publicClothSwap(upload_url, cloth_id, is_hr=0)
+    record['submit'] = time.perf_counter() - t
+    if public_res is None:
+        record['error'] = 'submit'
+        return record
+
+    t = time.perf_counter()
+    state = None
+    while time.perf_counter() - t < timeout_s:
+        time.sleep(poll_interval_s)
+        state = utils.getInfRes(public_res['id'])
+        record['status_calls'] += 1
+        if state is not None and state['status'] in ('SUCCEED', 'FAILED'):
+            break
+    record['poll'] = time.perf_counter() - t
+    if state is None or state['status'] != 'SUCCEED':
+        record['error'] = 'failed' if state is not None and state['status'] == 'FAILED' else 'timeout'
+        return record
+
+    t = time.perf_counter()
+    local_path = utils.download_result_image(state['output1'], f"loadgen_{vu_id}_{iteration}.jpg")
+    record['download'] = time.perf_counter() - t
+    if not local_path:
+        record['error'] = 'download'
+        return record
+    os.remove(local_path)
+
+    record['total'] = time.perf_counter() - start
+    record['ok'] = True
+    return record
+
+
+def virtual_user(vu_id, args, records, lock):
+    cloth_ids = [588 + (vu_id + i) % 9 for i in range(args.iterations)]
+    for i, cloth_id in enumerate(cloth_ids):
+        try:
+            record = run_iteration(vu_id, i, args.pose, cloth_id, args.poll_interval_s, args.timeout_s)
+        except Exception as e:
+            record = {'ok': False, 'error': f"exception: {e}", 'status_calls': 0}
+        with lock:
+            records.append(record)
+
+
+def report(records, wall_s):
+    ok = [r for r in records if r['ok']]
+    errors = {}
+    for r in records:
+        if not r['ok']:
+            errors[r['error']] = errors.get(r['error'], 0) + 1
+
+    print(f"{len(records)} try-ons in {wall_s:.1f}s: {len(ok)} ok, errors {errors or 'none'}")
+    print(f"throughput {len(ok) / wall_s:.2f} jobs/s, "
+          f"{sum(r['status_calls'] for r in records) / max(len(records), 1):.1f} status calls per job")
+    print(f"{'stage':>9} | {'p50 s':>7} | {'p95 s':>7} | {'p99 s':>7}")
+    for stage in STAGES:
+        values = [r[stage] for r in ok if stage in r]
+        print(f"{stage:>9} | {percentile(values, 0.5):>7.3f} | "
+              f"{percentile(values, 0.95):>7.3f} | {percentile(values, 0.99):>7.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--iterations', type=int, default=3)
+    parser.add_argument('--pose', default=DEFAULT_POSE)
+    parser.add_argument('--poll-interval-s', type=float, default=0.5)
+    parser.add_argument('--timeout-s', type=float, default=180)
+    parser.add_argument('--api-url', default=None, help="target an already running server")
+    mock_server.add_backend_arguments(parser)
+    args = parser.parse_args()
+
+    server = None
+    if args.api_url:
+        base_url = args.api_url.rstrip('/')
+    else:
+        server, base_url = mock_server.start_in_thread(**mock_server.backend_options(args))
+        print(f"Started mock API at {base_url}")
+
+    # Exercise the real remote upload path (/upload + PUT) against the target
+    utils.UKAPIURL = base_url
+    utils.USE_LOCAL_STORAGE = utils.USE_S3 = utils.USE_R2 = False
+
+    records, lock = [], threading.Lock()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.users, thread_name_prefix="outfit-vu") as pool:
+        for vu_id in range(args.users):
+            pool.submit(virtual_user, vu_id, args, records, lock)
+    report(records, time.perf_counter() - start)
+
+    if server is not None:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
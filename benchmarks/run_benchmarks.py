@@ -0,0 +1,184 @@
+"""Hot-path benchmark suite with stored baselines
+
+Covers image read + face detection at several sizes, catalog lookups on
+large synthetic catalogs, upload_pose_img in local storage mode and the
+end-to-end try-on flow against the in-process mock API.
+
+    python -m benchmarks.run_benchmarks                  # compare against baselines, exit 1 on regression or missing baseline
+    python -m benchmarks.run_benchmarks --save-baseline  # record this machine's numbers
+    python -m benchmarks.run_benchmarks -k catalog       # run a subset
+
+Baselines are machine specific; record them on the machine that runs the
+comparison (e.g. the CI runner) and commit benchmarks/baselines.json.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+
+import cv2
+
+import utils
+import catalog
+import thumbnails
+import mock_server
+from face_check import detect_faces_scaled
+from face_detectors import create_face_detector
+from benchmarks.loadgen import run_iteration
+
+
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(bench_dir, 'baselines.json')
+SOURCE_POSE = os.path.join(os.path.dirname(bench_dir), 'Datas', 'Poseimgs', 'pose_0.jpg')
+DEFAULT_TOLERANCE = 0.25
+IMAGE_LONG_SIDES = (640, 2048, 4000)
+CATALOG_SIZES = (1000, 10000)
+
+
+def _resized_copy(work_dir, long_side):
+    image = cv2.imread(SOURCE_POSE)
+    H, W = image.shape[:2]
+    scale = long_side / float(max(H, W))
+    path = os.path.join(work_dir, f"pose_{long_side}.jpg")
+    cv2.imwrite(path, cv2.resize(image, (round(W * scale), round(H * scale)), interpolation=cv2.INTER_CUBIC))
+    return path
+
+
+def bench_imread_detect(work_dir, long_side):
+    detector = create_face_detector()
+    path = _resized_copy(work_dir, long_side)
+    detect_faces_scaled(detector, cv2.imread(path))
+
+    def run():
+        detect_faces_scaled(detector, cv2.imread(path))
+    return run
+
+
+def bench_catalog(work_dir, size, warm):
+    cloth_dir = os.path.join(work_dir, f"catalog_{size}", 'ClothImgs')
+    os.makedirs(cloth_dir, exist_ok=True)
+    thumb = cv2.resize(cv2.imread(SOURCE_POSE), (32, 40))
+    ok, encoded = cv2.imencode('.jpg', thumb)
+    data = encoded.tobytes()
+    for i in range(size):
+        with open(os.path.join(cloth_dir, f"{100000 + i}.jpg"), 'wb') as f:
+            f.write(data)
+    utils.data_dir = os.path.dirname(cloth_dir)
+    catalog.CATALOG_INDEX_DIR = os.path.join(work_dir, 'catalog_index')
+
+    def run():
+        if not warm:
+            catalog._catalogs.clear()
+            thumbnails._hash_memo.clear()
+            shutil.rmtree(catalog.CATALOG_INDEX_DIR, ignore_errors=True)
+        utils.get_cloth_examples(hr=0)
+        utils.get_cloth_examples(hr=1)
+    if warm:
+        run()
+    return run
+
+
+def bench_upload_local(work_dir):
+    utils.USE_LOCAL_STORAGE = True
+    counter = iter(range(10 ** 9))
+
+    def run():
+        url = utils.upload_pose_img("127.0.0.1", next(counter), SOURCE_POSE)
+        os.remove(url)
+    return run
+
+
+def bench_end_to_end(work_dir):
+    server, base_url = mock_server.start_in_thread(median_s=0.2, sigma=0.0)
+    utils.UKAPIURL = base_url
+    utils.USE_LOCAL_STORAGE = utils.USE_S3 = utils.USE_R2 = False
+    counter = iter(range(10 ** 9))
+
+    def run():
+        record = run_iteration(0, next(counter), SOURCE_POSE, 592, 0.05, 30)
+        if not record['ok']:
+            raise RuntimeError(f"end-to-end try-on failed: {record['error']}")
+    return run
+
+
+def benchmarks():
+    """name -> (setup(work_dir) returning the timed callable, repeat count)"""
+    suite = {}
+    for long_side in IMAGE_LONG_SIDES:
+        suite[f"imread_detect_{long_side}"] = (lambda d, s=long_side: bench_imread_detect(d, s), 5)
+    for size in CATALOG_SIZES:
+        suite[f"catalog_cold_{size}"] = (lambda d, s=size: bench_catalog(d, s, warm=False), 3)
+        suite[f"catalog_warm_{size}"] = (lambda d, s=size: bench_catalog(d, s, warm=True), 50)
+    suite["upload_pose_img_local"] = (bench_upload_local, 20)
+    suite["end_to_end_mock"] = (bench_end_to_end, 5)
+    return suite
+
+
+def time_median_ms(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-k', dest='pattern', default=None, help="only run benchmarks whose name contains this")
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed slowdown over baseline, as a fraction")
+    args = parser.parse_args()
+
+    baselines = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baselines = json.load(f)
+
+    results, regressions, missing = {}, [], []
+    print(f"{'benchmark':>24} | {'median ms':>10} | {'baseline':>10} | change")
+    for name, (setup, repeat) in benchmarks().items():
+        if args.pattern and args.pattern not in name:
+            continue
+        work_dir = tempfile.mkdtemp(prefix="outfit-bench-")
+        try:
+            results[name] = time_median_ms(setup(work_dir), repeat)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        baseline = baselines.get(name)
+        if baseline:
+            change = results[name] / baseline - 1
+            flag = "  REGRESSION" if change > args.tolerance else ""
+            if flag:
+                regressions.append(name)
+            print(f"{name:>24} | {results[name]:>10.2f} | {baseline:>10.2f} | {change:+.0%}{flag}")
+        else:
+            missing.append(name)
+            print(f"{name:>24} | {results[name]:>10.2f} | {'-':>10} |  NO BASELINE")
+
+    if args.save_baseline:
+        baselines.update({name: round(ms, 3) for name, ms in results.items()})
+        with open(BASELINE_PATH, 'w') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print(f"Saved baselines to {BASELINE_PATH}")
+        return
+
+    if regressions:
+        print(f"\nFAILED: {len(regressions)} benchmark(s) slower than baseline by more than "
+              f"{args.tolerance:.0%}: {', '.join(regressions)}")
+    if missing:
+        # A run without baselines compares nothing, so it must not pass silently
+        print(f"\nFAILED: {len(missing)} benchmark(s) have no baseline in {BASELINE_PATH}: "
+              f"{', '.join(missing)}\nRecord them on the reference machine with --save-baseline")
+    if regressions or missing:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
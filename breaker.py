@@ -0,0 +1,112 @@
+import os
+import time
+import threading
+
+from metrics import inc, set_gauge, register_health
+
+
+# Circuit breaker configuration
+# Consecutive failures (timeouts, connection errors, 5xx) that open a breaker
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get('BREAKER_FAILURE_THRESHOLD', '5'))
+# Seconds an open breaker rejects calls before letting a probe through
+BREAKER_OPEN_S = float(os.environ.get('BREAKER_OPEN_S', '30'))
+# Upstream API endpoints guarded by a breaker; storage and CDN downloads are not
+BREAKER_ENDPOINTS = ('upload', 'public_advton', 'status_advton', 'public_comfyui', 'status_comfyui')
+
+# Breaker states
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+STATE_GAUGE = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with a single half-open probe
+
+    While open, allow() fails fast. After open_s the next caller becomes the
+    probe: its success closes the breaker, its failure opens it again.
+    """
+
+    def __init__(self, name, failure_threshold=BREAKER_FAILURE_THRESHOLD, open_s=BREAKER_OPEN_S):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.open_s = open_s
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.last_error = None
+        self._lock = threading.Lock()
+        set_gauge('breaker_state', STATE_GAUGE[CLOSED], endpoint=name)
+
+    def _set_state(self, state):
+        if state != self.state:
+            print(f"Circuit breaker {self.name}: {self.state} -> {state}")
+            inc('breaker_transitions_total', endpoint=self.name, state=state)
+            set_gauge('breaker_state', STATE_GAUGE[state], endpoint=self.name)
+        self.state = state
+
+    def allow(self):
+        """Return True if a call may go through now"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.time() - self.opened_at >= self.open_s:
+                self._set_state(HALF_OPEN)
+            if self.state == HALF_OPEN and not self.probe_in_flight:
+                self.probe_in_flight = True
+                return True
+            return False
+
+    def available(self):
+        """Whether a call would currently be allowed, without claiming the probe"""
+        with self._lock:
+            if self.state == OPEN:
+                return time.time() - self.opened_at >= self.open_s
+            return self.state == CLOSED or not self.probe_in_flight
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.probe_in_flight = False
+            self._set_state(CLOSED)
+
+    def record_failure(self, error=None):
+        with self._lock:
+            self.failures += 1
+            self.last_error = error
+            self.probe_in_flight = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.opened_at = time.time()
+                self._set_state(OPEN)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.failures,
+                'opened_at': self.opened_at if self.state != CLOSED else None,
+                'last_error': self.last_error,
+            }
+
+
+_breakers = {endpoint: CircuitBreaker(endpoint) for endpoint in BREAKER_ENDPOINTS}
+
+
+def get_breaker(endpoint):
+    """Breaker guarding endpoint, or None if the endpoint is not guarded"""
+    return _breakers.get(endpoint)
+
+
+def is_endpoint_available(endpoint):
+    """False while the endpoint's breaker is open, so callers can fail fast"""
+    breaker = _breakers.get(endpoint)
+    return breaker is None or breaker.available()
+
+
+def breaker_health():
+    """State of every breaker, for the health endpoint"""
+    return {endpoint: breaker.snapshot() for endpoint, breaker in _breakers.items()}
+
+
+register_health('breakers', breaker_health)
@@ -0,0 +1,212 @@
+"""Headless bulk try-on: every pose image against every cloth, without Streamlit
+
+Usage (from the project root):
+
+    python bulk_tryon.py --out bulk_out [--poses DIR] [--clothes DIR] [--workers 4] [--rate 2]
+                         [--hr] [--api-url URL] [--upload-mode api|local|s3|r2] [--limit N]
+
+Results are written to --out together with manifest.jsonl, one line per
+finished pair. Rerunning with the same --out skips pairs whose result
+image is already there, so an interrupted run resumes where it stopped.
+"""
+import os
+import json
+import time
+import shutil
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import utils
+import job_store
+from catalog import load_catalog
+from image_prep import normalize_pose_image
+from jobs import submit_tryon_job, add_finish_hook, get_job, SUCCEED, FAILED
+
+
+MANIFEST_NAME = "manifest.jsonl"
+DEFAULT_WORKERS = 4
+DEFAULT_RATE = 2.0
+
+
+class _RateLimiter:
+    """Spaces calls at least 1/rate seconds apart across all threads"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.next_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            wait_s = max(0.0, self.next_at - now)
+            self.next_at = max(now, self.next_at) + self.interval
+        if wait_s:
+            time.sleep(wait_s)
+
+
+def _pair_key(pose_path, cloth_id):
+    return f"{os.path.basename(pose_path)}|{cloth_id}"
+
+
+def load_manifest(out_dir):
+    """Return {pair_key: entry} for pairs recorded in out_dir's manifest"""
+    done = {}
+    manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return done
+    with open(manifest_path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # A line cut short by an interrupted run
+                continue
+            done[_pair_key(entry['pose'], entry['cloth_id'])] = entry
+    return done
+
+
+class BulkTryOn:
+    """Runs (pose, cloth) pairs through the job engine with bounded workers and a submit rate limit"""
+
+    def __init__(self, out_dir, workers=DEFAULT_WORKERS, rate=DEFAULT_RATE, is_hr=0, client_ip="127.0.0.1"):
+        self.out_dir = out_dir
+        self.workers = workers
+        self.limiter = _RateLimiter(rate)
+        self.is_hr = is_hr
+        self.client_ip = client_ip
+        self.manifest_lock = threading.Lock()
+        self.upload_lock = threading.Lock()
+        self.upload_path_locks = {}
+        self.last_time_id = 0
+        self.uploads = {}
+        os.makedirs(out_dir, exist_ok=True)
+
+    def _upload_once(self, pose_path):
+        """Upload each pose image once and share its URL across clothes"""
+        # The shared lock only hands out per-path locks, so different poses upload in parallel
+        with self.upload_lock:
+            path_lock = self.upload_path_locks.setdefault(pose_path, threading.Lock())
+            # Uploads of different poses overlap, so give each a distinct file name
+            time_id = self.last_time_id = max(int(time.time() * 1000), self.last_time_id + 1)
+        with path_lock:
+            if pose_path not in self.uploads:
+                url = utils.upload_pose_img(self.client_ip, time_id, pose_path)
+                self.uploads[pose_path] = url or None
+            return self.uploads[pose_path]
+
+    def _record(self, entry):
+        with self.manifest_lock:
+            with open(os.path.join(self.out_dir, MANIFEST_NAME), 'a') as f:
+                f.write(json.dumps(entry) + "\n")
+
+    def run_pair(self, pose_path, cloth_id):
+        """Try cloth_id on pose_path, save the result and record it in the manifest"""
+        start = time.time()
+        normalized = normalize_pose_image(pose_path, self.is_hr)
+        self.limiter.wait()
+        upload_url = self._upload_once(normalized)
+
+        finished = threading.Event()
+        job_id = submit_tryon_job(normalized, cloth_id, self.is_hr, self.client_ip, upload_url=upload_url)
+        add_finish_hook(job_id, lambda _: finished.set())
+        finished.wait()
+        job = get_job(job_id)
+
+        entry = {
+            'pose': os.path.basename(pose_path),
+            'cloth_id': cloth_id,
+            'status': job['status'],
+            'message': job['message'],
+            'result': None,
+            'latency': round(time.time() - start, 3),
+            'status_calls': job['status_calls'],
+            'finished_at': time.time(),
+        }
+        if job['status'] == SUCCEED:
+            if job['result'] and job['result'][0] and os.path.exists(job['result'][0]):
+                pose_name = os.path.splitext(os.path.basename(pose_path))[0]
+                result_path = os.path.join(self.out_dir, f"{pose_name}__{cloth_id}.jpg")
+                shutil.copyfile(job['result'][0], result_path)
+                entry['result'] = os.path.basename(result_path)
+            else:
+                # Never checkpoint a pair as done without its output
+                entry.update(status=FAILED, message="❌ Result file missing")
+        self._record(entry)
+        return entry
+
+    def _is_done(self, entry):
+        """A pair is done only if it succeeded and its output is still in out_dir"""
+        return (
+            entry is not None and entry.get('status') == SUCCEED and bool(entry.get('result'))
+            and os.path.exists(os.path.join(self.out_dir, entry['result']))
+        )
+
+    def run(self, pose_paths, cloth_ids):
+        """Run every pending pair and return a summary dict"""
+        done = load_manifest(self.out_dir)
+        pairs = [
+            (pose_path, cloth_id) for pose_path in pose_paths for cloth_id in cloth_ids
+            if not self._is_done(done.get(_pair_key(pose_path, cloth_id)))
+        ]
+        skipped = len(pose_paths) * len(cloth_ids) - len(pairs)
+        print(f"{len(pairs)} pairs to run, {skipped} already done")
+
+        start = time.time()
+        counts = {}
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="outfit-bulk") as pool:
+            futures = [pool.submit(self.run_pair, pose_path, cloth_id) for pose_path, cloth_id in pairs]
+            for i, future in enumerate(futures, 1):
+                try:
+                    entry = future.result()
+                    status = entry['status']
+                except Exception as e:
+                    print(f"Bulk pair error: {e}")
+                    status = 'ERROR'
+                counts[status] = counts.get(status, 0) + 1
+                print(f"[{i}/{len(pairs)}] {status}")
+
+        return {'pairs': len(pairs), 'skipped': skipped, 'counts': counts, 'elapsed': round(time.time() - start, 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--poses', default=os.path.join(utils.data_dir, 'PoseImgs'))
+    parser.add_argument('--clothes', default=os.path.join(utils.data_dir, 'ClothImgs'))
+    parser.add_argument('--out', required=True)
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE, help="max submissions per second")
+    parser.add_argument('--hr', action='store_true', help="use the high resolution tier")
+    parser.add_argument('--api-url', default=None, help="override UKAPIURL (e.g. a local stub)")
+    parser.add_argument('--upload-mode', choices=['local', 'api', 's3', 'r2'], default=None)
+    parser.add_argument('--limit', type=int, default=None, help="only use the first N poses and clothes")
+    args = parser.parse_args()
+
+    # Keep this run's jobs out of the app's store so the app never resumes them;
+    # an interrupted run resumes from its manifest instead
+    job_store.use_store(os.path.join(args.out, "jobs.sqlite3"))
+    if args.api_url:
+        utils.UKAPIURL = args.api_url.rstrip('/')
+    if args.upload_mode:
+        utils.USE_LOCAL_STORAGE = args.upload_mode == 'local'
+        utils.USE_S3 = args.upload_mode == 's3'
+        utils.USE_R2 = args.upload_mode == 'r2'
+
+    pose_paths = list(load_catalog(args.poses)['paths'])
+    cloth_ids = [item['id'] for item in load_catalog(args.clothes)['items']]
+    if args.limit:
+        pose_paths, cloth_ids = pose_paths[:args.limit], cloth_ids[:args.limit]
+    if not pose_paths or not cloth_ids:
+        raise SystemExit("No pose or cloth images found")
+
+    runner = BulkTryOn(args.out, args.workers, args.rate, 1 if args.hr else 0)
+    summary = runner.run(pose_paths, cloth_ids)
+    print(json.dumps(summary))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+import os
+import json
+import hashlib
+import threading
+
+from PIL import Image
+
+from thumbnails import file_sha1
+
+
+# Catalog index configuration
+CATALOG_INDEX_DIR = os.path.join("tmp", "catalog")
+CATALOG_META_FILE = "catalog_meta.json"
+CATALOG_INDEX_VERSION = 2
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+DEFAULT_TIER = "standard"
+PREMIUM_TIER = "premium"
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def resolve_image_dir(image_dir):
+    """Return image_dir, or its case-insensitive match in the parent directory"""
+    if os.path.isdir(image_dir):
+        return image_dir
+    parent, name = os.path.split(image_dir)
+    if os.path.isdir(parent):
+        for entry in os.listdir(parent):
+            if entry.lower() == name.lower() and os.path.isdir(os.path.join(parent, entry)):
+                return os.path.join(parent, entry)
+    return None
+
+
+def _signature(image_dir):
+    """Cheap change detector: directory mtime plus metadata file mtime"""
+    meta_path = os.path.join(image_dir, CATALOG_META_FILE)
+    meta_mtime = os.stat(meta_path).st_mtime_ns if os.path.exists(meta_path) else 0
+    return [os.stat(image_dir).st_mtime_ns, meta_mtime]
+
+
+def _index_path(image_dir):
+    digest = hashlib.sha1(os.path.abspath(image_dir).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(CATALOG_INDEX_DIR, f"{os.path.basename(image_dir)}_{digest}.json")
+
+
+def _load_meta(image_dir):
+    """Read the tier assignments from the catalog metadata file, if any"""
+    meta_path = os.path.join(image_dir, CATALOG_META_FILE)
+    tiers = {}
+    if not os.path.exists(meta_path):
+        return tiers
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+        for tier, ids in meta.get("tiers", {}).items():
+            for item_id in ids:
+                tiers[str(item_id)] = tier
+    except Exception as e:
+        print(f"Catalog metadata error in {meta_path}: {e}")
+    return tiers
+
+
+def _read_dimensions(path):
+    """Image size from the file header, without decoding pixels"""
+    try:
+        with Image.open(path) as img:
+            return img.size
+    except Exception as e:
+        print(f"Catalog cannot read {path}: {e}")
+        return 0, 0
+
+
+def _build_items(image_dir, previous_items):
+    """Scan image_dir, reusing dimensions and hashes of files unchanged since the last index"""
+    previous = {item["file"]: item for item in previous_items}
+    tiers = _load_meta(image_dir)
+    items = []
+    for f in sorted(os.listdir(image_dir)):
+        if not f.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        path = os.path.join(image_dir, f)
+        stat = os.stat(path)
+        old = previous.get(f)
+        if old is not None and old["size"] == stat.st_size and old["mtime_ns"] == stat.st_mtime_ns:
+            width, height, sha1 = old["width"], old["height"], old["sha1"]
+        else:
+            width, height = _read_dimensions(path)
+            sha1 = file_sha1(path)
+
+        item_id = f.rsplit(".", 1)[0]
+        items.append({
+            "id": item_id,
+            "file": f,
+            "path": path,
+            "tier": tiers.get(item_id, DEFAULT_TIER),
+            "width": width,
+            "height": height,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha1": sha1,
+        })
+    return items
+
+
+def _make_catalog(items):
+    """Attach the lookup tables used on every rerun
+
+    Path lists are tuples so callers can share them without copying; tiers
+    list the newest (highest) ids first. hashes maps each path to its content
+    hash so previews can be looked up without re-reading the file.
+    """
+    by_tier = {}
+    for item in reversed(items):
+        by_tier.setdefault(item["tier"], []).append(item["path"])
+    return {
+        "items": items,
+        "by_id": {item["id"]: item for item in items},
+        "by_tier": {tier: tuple(paths) for tier, paths in by_tier.items()},
+        "paths": tuple(item["path"] for item in items),
+        "hashes": {item["path"]: item["sha1"] for item in items},
+    }
+
+
+def load_catalog(image_dir):
+    """Return the catalog index for image_dir, rebuilding it only when the directory changes
+
+    The index lives in memory and is persisted under CATALOG_INDEX_DIR, so a
+    rerun costs two stat calls and a process restart reuses the saved index.
+    """
+    resolved = resolve_image_dir(image_dir)
+    if resolved is None:
+        return _make_catalog([])
+
+    signature = _signature(resolved)
+    with _catalogs_lock:
+        cached = _catalogs.get(resolved)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        index_path = _index_path(resolved)
+        saved = None
+        if os.path.exists(index_path):
+            try:
+                with open(index_path) as f:
+                    saved = json.load(f)
+            except Exception as e:
+                print(f"Catalog index read error: {e}")
+
+        if saved and saved.get("version") == CATALOG_INDEX_VERSION and saved.get("signature") == signature:
+            items = saved["items"]
+        else:
+            items = _build_items(resolved, saved["items"] if saved and saved.get("version") == CATALOG_INDEX_VERSION else [])
+            try:
+                os.makedirs(CATALOG_INDEX_DIR, exist_ok=True)
+                tmp_path = index_path + ".tmp"
+                with open(tmp_path, "w") as f:
+                    json.dump({"version": CATALOG_INDEX_VERSION, "signature": signature, "items": items}, f)
+                os.replace(tmp_path, index_path)
+            except Exception as e:
+                print(f"Catalog index write error: {e}")
+
+        catalog = _make_catalog(items)
+        _catalogs[resolved] = (signature, catalog)
+        return catalog
@@ -0,0 +1,85 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+from metrics import span
+
+
+# Face validation configuration
+# Longest side of the copy the detector runs on; boxes are mapped back to full size
+FACE_DETECT_MAX_SIDE = 1024
+MAX_FACE_RATIO = 1 / 3.3
+FACE_VERDICT_CACHE_SIZE = 512
+
+MSG_READ_FAILED = "❌ Failed to read image. Please try another image."
+MSG_NO_FACE = "❌ Fatal Error! No face detected! You must upload a human photo, not a clothing photo!"
+MSG_HEADSHOT = "❌ Fatal Error! Headshot is not allowed! You must upload a full-body or half-body photo!"
+
+_verdicts = OrderedDict()
+_verdicts_lock = threading.Lock()
+
+
+def downscale_for_detection(image_bgr, max_side=FACE_DETECT_MAX_SIDE):
+    """Return a copy no larger than max_side on its longest side and the scale used"""
+    H, W = image_bgr.shape[:2]
+    scale = min(1.0, max_side / float(max(H, W)))
+    if scale >= 1.0:
+        return image_bgr, 1.0
+    small = cv2.resize(image_bgr, (max(1, round(W * scale)), max(1, round(H * scale))),
+                       interpolation=cv2.INTER_AREA)
+    return small, scale
+
+
+def detect_faces_scaled(detector, image_bgr, max_side=FACE_DETECT_MAX_SIDE):
+    """Detect faces on a downscaled copy, returning boxes in original image coordinates"""
+    small, scale = downscale_for_detection(image_bgr, max_side)
+    faces = detector.detect_faces(np.ascontiguousarray(small[:, :, ::-1]))
+    for face in faces:
+        face['box'] = [int(round(v / scale)) for v in face['box']]
+    return faces
+
+
+def check_faces(faces, image_shape):
+    """Apply the no-face and headshot rules, returning (ok, message)"""
+    if len(faces) == 0:
+        return False, MSG_NO_FACE
+
+    x, y, w, h = faces[0]["box"]
+    H, W = image_shape[:2]
+    if w / W > MAX_FACE_RATIO or h / H > MAX_FACE_RATIO:
+        return False, MSG_HEADSHOT
+    return True, ""
+
+
+def validate_pose_image(detector, image_path):
+    """Validate that image_path shows a full or half body photo
+
+    Verdicts are cached by the SHA-1 of the file contents, so validating the
+    same photo again (e.g. with a different cloth) skips decoding and detection.
+    """
+    with open(image_path, 'rb') as f:
+        data = f.read()
+    key = hashlib.sha1(data).hexdigest()
+
+    with _verdicts_lock:
+        verdict = _verdicts.get(key)
+        if verdict is not None:
+            _verdicts.move_to_end(key)
+            return verdict
+
+    with span('decode'):
+        image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        return False, MSG_READ_FAILED
+
+    with span('face_detect'):
+        faces = detect_faces_scaled(detector, image)
+    verdict = check_faces(faces, image.shape)
+    with _verdicts_lock:
+        _verdicts[key] = verdict
+        while len(_verdicts) > FACE_VERDICT_CACHE_SIZE:
+            _verdicts.popitem(last=False)
+    return verdict
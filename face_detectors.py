@@ -0,0 +1,137 @@
+import os
+import time
+import threading
+
+import cv2
+import numpy as np
+
+from startup_profile import record_duration
+
+
+# Face detector configuration: 'mtcnn', 'haar' or 'dnn'
+FACE_DETECTOR_BACKEND = os.environ.get('FACE_DETECTOR_BACKEND', 'mtcnn')
+# Build the detector in a background thread after the first page render
+FACE_DETECTOR_WARMUP = os.environ.get('FACE_DETECTOR_WARMUP', '1') == '1'
+HAAR_CASCADE_PATH = os.environ.get(
+    'FACE_HAAR_CASCADE',
+    os.path.join(cv2.data.haarcascades, 'haarcascade_frontalface_default.xml')
+)
+# OpenCV DNN backend uses the res10 SSD face model; it is not bundled with opencv-python
+proj_dir = os.path.dirname(os.path.abspath(__file__))
+models_dir = os.path.join(proj_dir, 'models')
+DNN_PROTOTXT_PATH = os.environ.get('FACE_DNN_PROTOTXT', os.path.join(models_dir, 'deploy.prototxt'))
+DNN_MODEL_PATH = os.environ.get('FACE_DNN_MODEL', os.path.join(models_dir, 'res10_300x300_ssd_iter_140000.caffemodel'))
+DNN_INPUT_SIZE = 300
+DNN_MIN_CONFIDENCE = 0.5
+
+
+# Every backend exposes detect_faces(image_rgb) and returns MTCNN-style results:
+# a list of {'box': [x, y, w, h], 'confidence': float}, best face first.
+
+class MTCNNDetector:
+    """MTCNN (TensorFlow) detector, the most accurate and slowest backend"""
+
+    def __init__(self):
+        from mtcnn.mtcnn import MTCNN
+        self.model = MTCNN()
+
+    def detect_faces(self, image_rgb):
+        return self.model.detect_faces(image_rgb)
+
+
+class HaarDetector:
+    """OpenCV Haar cascade detector, CPU-cheap but prone to false positives"""
+
+    def __init__(self, cascade_path=HAAR_CASCADE_PATH):
+        self.cascade = cv2.CascadeClassifier(cascade_path)
+        if self.cascade.empty():
+            raise RuntimeError(f"Cannot load Haar cascade from {cascade_path}")
+
+    def detect_faces(self, image_rgb):
+        gray = cv2.cvtColor(image_rgb, cv2.COLOR_RGB2GRAY)
+        boxes = self.cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(24, 24))
+        # The cascade has no confidence score; treat the largest face as the best
+        faces = [{'box': [int(x), int(y), int(w), int(h)], 'confidence': 1.0} for x, y, w, h in boxes]
+        faces.sort(key=lambda f: f['box'][2] * f['box'][3], reverse=True)
+        return faces
+
+
+class DnnDetector:
+    """OpenCV DNN (res10 SSD) detector, close to MTCNN accuracy without TensorFlow"""
+
+    def __init__(self, prototxt_path=DNN_PROTOTXT_PATH, model_path=DNN_MODEL_PATH):
+        if not os.path.exists(prototxt_path) or not os.path.exists(model_path):
+            raise RuntimeError(f"DNN face model not found: {prototxt_path}, {model_path}")
+        self.net = cv2.dnn.readNetFromCaffe(prototxt_path, model_path)
+
+    def detect_faces(self, image_rgb):
+        H, W = image_rgb.shape[:2]
+        blob = cv2.dnn.blobFromImage(
+            cv2.resize(image_rgb, (DNN_INPUT_SIZE, DNN_INPUT_SIZE)),
+            1.0, (DNN_INPUT_SIZE, DNN_INPUT_SIZE), (104.0, 177.0, 123.0), swapRB=True
+        )
+        self.net.setInput(blob)
+        detections = self.net.forward()
+
+        faces = []
+        for i in range(detections.shape[2]):
+            confidence = float(detections[0, 0, i, 2])
+            if confidence < DNN_MIN_CONFIDENCE:
+                continue
+            x1, y1, x2, y2 = (detections[0, 0, i, 3:7] * np.array([W, H, W, H])).astype(int)
+            x1, y1 = max(0, x1), max(0, y1)
+            faces.append({'box': [int(x1), int(y1), int(x2 - x1), int(y2 - y1)], 'confidence': confidence})
+        faces.sort(key=lambda f: f['confidence'], reverse=True)
+        return faces
+
+
+FACE_DETECTOR_BACKENDS = {
+    'mtcnn': MTCNNDetector,
+    'haar': HaarDetector,
+    'dnn': DnnDetector,
+}
+
+
+def create_face_detector(backend=None):
+    """Build the face detector for backend (defaults to FACE_DETECTOR_BACKEND)"""
+    backend = (backend or FACE_DETECTOR_BACKEND).lower()
+    if backend not in FACE_DETECTOR_BACKENDS:
+        raise ValueError(f"Unknown face detector backend '{backend}', "
+                         f"expected one of {', '.join(FACE_DETECTOR_BACKENDS)}")
+    return FACE_DETECTOR_BACKENDS[backend]()
+
+
+_shared_detector = None
+_shared_lock = threading.Lock()
+_warmup_thread = None
+
+
+def get_shared_face_detector():
+    """Return the process-wide detector, building it on first use
+
+    Callers block here while a warm-up thread is still loading the model.
+    """
+    global _shared_detector
+    with _shared_lock:
+        if _shared_detector is None:
+            start = time.perf_counter()
+            _shared_detector = create_face_detector()
+            record_duration('face_detector_load', time.perf_counter() - start)
+        return _shared_detector
+
+
+def _warm_up():
+    try:
+        get_shared_face_detector()
+    except Exception as e:
+        print(f"Face detector warm-up error: {e}")
+
+
+def warm_face_detector_async():
+    """Start loading the shared detector in the background, once per process"""
+    global _warmup_thread
+    with _shared_lock:
+        if _shared_detector is not None or _warmup_thread is not None:
+            return
+        _warmup_thread = threading.Thread(target=_warm_up, name="outfit-face-warmup", daemon=True)
+        _warmup_thread.start()
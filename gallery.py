@@ -0,0 +1,79 @@
+import os
+import math
+
+import streamlit as st
+
+from thumbnails import get_thumbnail
+
+
+# Gallery configuration
+GALLERY_COLUMNS = 4
+GALLERY_ROWS = 2
+GALLERY_THUMBNAIL_BUCKET = 'xs'
+
+
+def _default_label(path):
+    return os.path.basename(path).split(".")[0]
+
+
+def _select(selected_key, path):
+    st.session_state[selected_key] = path
+
+
+def _turn_page(page_key, delta, pages):
+    st.session_state[page_key] = min(max(st.session_state.get(page_key, 0) + delta, 0), pages - 1)
+
+
+def render_gallery_picker(items, key, format_label=_default_label, columns=GALLERY_COLUMNS, rows=GALLERY_ROWS,
+                          content_hashes=None):
+    """Render a paginated thumbnail grid over items and return the selected path
+
+    Only the visible page's thumbnails are loaded, so a rerun costs at most
+    columns * rows image loads however large the catalog is. Selection and
+    paging live in session state under key. content_hashes maps paths to
+    known content hashes (e.g. from the catalog index) so sources are not
+    re-hashed to find their thumbnails.
+    """
+    if len(items) == 0:
+        return None
+
+    page_key = f"{key}_page"
+    selected_key = f"{key}_selected"
+    page_size = columns * rows
+    pages = math.ceil(len(items) / page_size)
+
+    page = min(max(st.session_state.get(page_key, 0), 0), pages - 1)
+    st.session_state[page_key] = page
+    if st.session_state.get(selected_key) not in items:
+        st.session_state[selected_key] = items[0]
+    selected = st.session_state[selected_key]
+
+    visible = items[page * page_size:(page + 1) * page_size]
+    for row_start in range(0, len(visible), columns):
+        cols = st.columns(columns)
+        for col, path in zip(cols, visible[row_start:row_start + columns]):
+            with col:
+                content_hash = content_hashes.get(path) if content_hashes else None
+                st.image(get_thumbnail(path, GALLERY_THUMBNAIL_BUCKET, content_hash), use_container_width=True)
+                label = format_label(path)
+                st.button(
+                    f"✅ {label}" if path == selected else label,
+                    key=f"{key}_pick_{path}",
+                    type="primary" if path == selected else "secondary",
+                    use_container_width=True,
+                    on_click=_select,
+                    args=(selected_key, path),
+                )
+
+    if pages > 1:
+        prev_col, info_col, next_col = st.columns([1, 2, 1])
+        with prev_col:
+            st.button("◀", key=f"{key}_prev", disabled=page == 0, use_container_width=True,
+                      on_click=_turn_page, args=(page_key, -1, pages))
+        with info_col:
+            st.caption(f"Page {page + 1} of {pages} · {len(items)} items")
+        with next_col:
+            st.button("▶", key=f"{key}_next", disabled=page == pages - 1, use_container_width=True,
+                      on_click=_turn_page, args=(page_key, 1, pages))
+
+    return selected
@@ -0,0 +1,138 @@
+import os
+import time
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from metrics import record_http
+from breaker import get_breaker
+
+
+# HTTP client configuration
+HTTP_CONNECT_TIMEOUT = float(os.environ.get('HTTP_CONNECT_TIMEOUT', '5'))
+HTTP_RETRIES = int(os.environ.get('HTTP_RETRIES', '2'))
+HTTP_BACKOFF_FACTOR = 0.3
+HTTP_RETRY_STATUSES = (502, 503, 504)
+
+# Per-endpoint pool size, read timeout (seconds) and whether a request may be
+# replayed after it reached the server. Non-idempotent endpoints only retry
+# failures that happen before the request is sent (connect errors). Optional
+# 'retries' and 'connect_timeout' override HTTP_RETRIES and HTTP_CONNECT_TIMEOUT.
+ENDPOINT_SETTINGS = {
+    'default': {'pool_maxsize': 10, 'timeout': 30, 'idempotent': True},
+    'upload': {'pool_maxsize': 10, 'timeout': 30, 'idempotent': False},
+    'imgur': {'pool_maxsize': 4, 'timeout': 30, 'idempotent': False},
+    'storage_put': {'pool_maxsize': 10, 'timeout': 60, 'idempotent': True},
+    'public_advton': {'pool_maxsize': 10, 'timeout': 30, 'idempotent': False},
+    'status_advton': {'pool_maxsize': 20, 'timeout': 10, 'idempotent': True},
+    'public_comfyui': {'pool_maxsize': 10, 'timeout': 30, 'idempotent': False},
+    'status_comfyui': {'pool_maxsize': 20, 'timeout': 10, 'idempotent': True},
+    'probe': {'pool_maxsize': 10, 'timeout': 5, 'idempotent': True},
+    'download': {'pool_maxsize': 10, 'timeout': 30, 'idempotent': True},
+    # Runs inline on page load, so one attempt capped at about 5s in total
+    'region': {'pool_maxsize': 4, 'timeout': 3, 'connect_timeout': 2, 'retries': 0, 'idempotent': True},
+}
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised without touching the network while an endpoint's breaker is open"""
+
+
+def _build_session(settings):
+    """Create a keep-alive session with a retrying, pooled adapter"""
+    retries = settings.get('retries', HTTP_RETRIES)
+    if settings['idempotent']:
+        retry = Retry(
+            total=retries,
+            backoff_factor=HTTP_BACKOFF_FACTOR,
+            status_forcelist=HTTP_RETRY_STATUSES,
+            allowed_methods=Retry.DEFAULT_ALLOWED_METHODS | {'POST'},
+            raise_on_status=False,
+        )
+    else:
+        retry = Retry(total=retries, connect=retries, read=0, status=0, other=0,
+                      backoff_factor=HTTP_BACKOFF_FACTOR, raise_on_status=False)
+
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=settings['pool_maxsize'], max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def get_session(endpoint='default'):
+    """Return the shared session for endpoint, creating it on first use
+
+    Each endpoint gets its own connection pool so a burst of status polls
+    cannot starve submissions or downloads of connections.
+    """
+    session = _sessions.get(endpoint)
+    if session is not None:
+        return session
+    with _sessions_lock:
+        if endpoint not in _sessions:
+            settings = ENDPOINT_SETTINGS.get(endpoint, ENDPOINT_SETTINGS['default'])
+            _sessions[endpoint] = _build_session(settings)
+        return _sessions[endpoint]
+
+
+def request(endpoint, method, url, **kwargs):
+    """Send a request through the pooled session for endpoint
+
+    Every call is recorded in the per-endpoint latency and outcome metrics.
+    Guarded endpoints fail fast with CircuitOpenError while their breaker is
+    open; timeouts, connection errors and 5xx answers count as failures.
+    """
+    breaker = get_breaker(endpoint)
+    if breaker is not None and not breaker.allow():
+        record_http(endpoint, 0.0, 'circuit_open')
+        raise CircuitOpenError(f"{endpoint} is unavailable (circuit open)")
+
+    if 'timeout' not in kwargs:
+        settings = ENDPOINT_SETTINGS.get(endpoint, ENDPOINT_SETTINGS['default'])
+        kwargs['timeout'] = (settings.get('connect_timeout', HTTP_CONNECT_TIMEOUT), settings['timeout'])
+    start = time.perf_counter()
+    try:
+        response = get_session(endpoint).request(method, url, **kwargs)
+    except requests.Timeout as e:
+        record_http(endpoint, time.perf_counter() - start, 'timeout')
+        if breaker is not None:
+            breaker.record_failure(f"timeout: {e}")
+        raise
+    except requests.RequestException as e:
+        record_http(endpoint, time.perf_counter() - start, 'error')
+        if breaker is not None:
+            breaker.record_failure(f"error: {e}")
+        raise
+    except BaseException:
+        # Never leave a half-open probe claimed
+        if breaker is not None:
+            breaker.record_failure("interrupted")
+        raise
+    record_http(endpoint, time.perf_counter() - start, response.status_code)
+    if breaker is not None:
+        if response.status_code >= 500:
+            breaker.record_failure(f"HTTP {response.status_code}")
+        else:
+            breaker.record_success()
+    return response
+
+
+def http_get(endpoint, url, **kwargs):
+    return request(endpoint, 'GET', url, **kwargs)
+
+
+def http_post(endpoint, url, **kwargs):
+    return request(endpoint, 'POST', url, **kwargs)
+
+
+def http_put(endpoint, url, **kwargs):
+    return request(endpoint, 'PUT', url, **kwargs)
+
+
+def http_head(endpoint, url, **kwargs):
+    return request(endpoint, 'HEAD', url, **kwargs)
@@ -0,0 +1,111 @@
+import io
+import os
+import hashlib
+import threading
+
+from PIL import Image, ImageOps
+
+from thumbnails import file_sha1
+
+
+# Upload image configuration
+UPLOAD_MAX_SIDE = 4096
+UPLOAD_MAX_BYTES = 8 * 1024 * 1024
+UPLOAD_JPEG_QUALITY = 92
+JPEG_MAGIC = b'\xff\xd8\xff'
+EXIF_ORIENTATION_TAG = 0x0112
+
+# Canonical pose image configuration: longest side per resolution tier (is_hr)
+NORMALIZED_DIR = os.path.join("tmp", "normalized")
+NORMALIZE_MAX_SIDE = {0: 1536, 1: 2048}
+NORMALIZE_JPEG_QUALITY = 88
+
+
+def is_upload_ready(path):
+    """Check whether path can be uploaded byte-for-byte
+
+    True for baseline RGB/grayscale JPEGs within the size caps whose EXIF
+    orientation (if any) is already upright. Only the header is read.
+    """
+    try:
+        if os.path.getsize(path) > UPLOAD_MAX_BYTES:
+            return False
+        with open(path, 'rb') as f:
+            if f.read(3) != JPEG_MAGIC:
+                return False
+        with Image.open(path) as img:
+            if img.format != 'JPEG' or img.mode not in ('RGB', 'L'):
+                return False
+            if max(img.size) > UPLOAD_MAX_SIDE:
+                return False
+            return img.getexif().get(EXIF_ORIENTATION_TAG, 1) == 1
+    except Exception as e:
+        print(f"Upload header check error for {path}: {e}")
+        return False
+
+
+def transcode_for_upload(src_path, dst_path, max_side=UPLOAD_MAX_SIDE, quality=UPLOAD_JPEG_QUALITY):
+    """Write an upright, size-capped, metadata-free JPEG copy of src_path (a path or file object) to dst_path"""
+    with Image.open(src_path) as img:
+        img.draft('RGB', (max_side, max_side))
+        img = ImageOps.exif_transpose(img)
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        img.thumbnail((max_side, max_side), Image.LANCZOS)
+        img.save(dst_path, 'JPEG', quality=quality, optimize=True)
+    return dst_path
+
+
+def prepare_upload_source(src_path, transcode_path):
+    """Return (path, transcoded) for the file that should be uploaded
+
+    The original file is used as-is when it is already an acceptable JPEG;
+    otherwise a single transcode is written to transcode_path.
+    """
+    if is_upload_ready(src_path):
+        return src_path, False
+    return transcode_for_upload(src_path, transcode_path), True
+
+
+def _normalized_artifact(source, content_hash, is_hr):
+    """Write the normalized copy of source once per content hash and tier"""
+    dst_path = os.path.join(NORMALIZED_DIR, f"{content_hash}_{is_hr}.jpg")
+    if not os.path.exists(dst_path):
+        os.makedirs(NORMALIZED_DIR, exist_ok=True)
+        tmp_path = f"{dst_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        transcode_for_upload(source, tmp_path, NORMALIZE_MAX_SIDE[is_hr], NORMALIZE_JPEG_QUALITY)
+        os.replace(tmp_path, dst_path)
+    return dst_path
+
+
+def normalize_pose_image(src_path, is_hr=0):
+    """Return the canonical upload artifact for src_path at the given tier
+
+    The artifact is upright, capped to NORMALIZE_MAX_SIDE[is_hr], stripped of
+    metadata and re-encoded once; it is keyed by the source's content hash so
+    face validation, upload and preview all reuse the same file. Falls back to
+    src_path if the image cannot be decoded.
+    """
+    if not src_path or not os.path.isfile(src_path):
+        return src_path
+    try:
+        return _normalized_artifact(src_path, file_sha1(src_path), is_hr)
+    except Exception as e:
+        print(f"Normalize error for {src_path}: {e}")
+        return src_path
+
+
+def normalize_pose_bytes(data, is_hr=0, content_hash=None):
+    """Return the canonical upload artifact for in-memory image bytes, or None
+
+    Same artifact as normalize_pose_image, decoded straight from memory: the
+    original upload never touches disk and, once the artifact exists, later
+    calls for the same content cost a single stat.
+    """
+    if not data:
+        return None
+    try:
+        return _normalized_artifact(io.BytesIO(data), content_hash or hashlib.sha1(data).hexdigest(), is_hr)
+    except Exception as e:
+        print(f"Normalize error for uploaded image: {e}")
+        return None
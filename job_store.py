@@ -0,0 +1,192 @@
+import os
+import json
+import time
+import atexit
+import uuid
+import socket
+import sqlite3
+import threading
+
+
+# Job store configuration
+# Kept out of tmp/, which the storage sweeper evicts from
+JOB_STORE_PATH = os.environ.get('JOB_STORE_PATH', os.path.join("data", "jobs.sqlite3"))
+JOB_STORE_RETENTION_S = int(os.environ.get('JOB_STORE_RETENTION_S', str(7 * 24 * 3600)))
+# Every process sharing the store heartbeats its owner row; jobs whose owner has
+# been silent for JOB_OWNER_TTL_S are considered orphaned and may be resumed
+JOB_OWNER_HEARTBEAT_S = int(os.environ.get('JOB_OWNER_HEARTBEAT_S', '30'))
+JOB_OWNER_TTL_S = int(os.environ.get('JOB_OWNER_TTL_S', '90'))
+OWNER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    input_hash TEXT,
+    status TEXT NOT NULL,
+    task_id TEXT,
+    params TEXT NOT NULL,
+    result TEXT NOT NULL,
+    info TEXT NOT NULL,
+    message TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    finished_at REAL,
+    owner TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_unfinished ON jobs (finished_at) WHERE finished_at IS NULL;
+CREATE TABLE IF NOT EXISTS owners (
+    id TEXT PRIMARY KEY,
+    heartbeat_at REAL NOT NULL
+);
+"""
+COLUMNS = ('id', 'kind', 'input_hash', 'status', 'task_id', 'params', 'result', 'info', 'message',
+           'created_at', 'updated_at', 'finished_at', 'owner')
+
+_conn = None
+_lock = threading.Lock()
+_heartbeat_started = False
+
+
+def _connection():
+    """Open the store once per process; callers hold _lock"""
+    global _conn
+    if _conn is None:
+        os.makedirs(os.path.dirname(JOB_STORE_PATH) or '.', exist_ok=True)
+        conn = sqlite3.connect(JOB_STORE_PATH, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        if 'owner' not in [row[1] for row in conn.execute("PRAGMA table_info(jobs)")]:
+            # Stores created before jobs had owners
+            conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+        conn.execute("INSERT OR REPLACE INTO owners (id, heartbeat_at) VALUES (?, ?)", (OWNER_ID, time.time()))
+        _conn = conn
+        _start_heartbeat()
+    return _conn
+
+
+def use_store(path):
+    """Point this process at another store file; call before any job is saved"""
+    global JOB_STORE_PATH, _conn
+    with _lock:
+        if _conn is not None:
+            _conn.close()
+            _conn = None
+        JOB_STORE_PATH = path
+
+
+def _heartbeat_loop():
+    while True:
+        time.sleep(JOB_OWNER_HEARTBEAT_S)
+        now = time.time()
+        try:
+            with _lock:
+                conn = _connection()
+                conn.execute("INSERT OR REPLACE INTO owners (id, heartbeat_at) VALUES (?, ?)", (OWNER_ID, now))
+                conn.execute("DELETE FROM owners WHERE heartbeat_at < ?", (now - JOB_STORE_RETENTION_S,))
+        except Exception as e:
+            print(f"Job store heartbeat error: {e}")
+
+
+def _start_heartbeat():
+    global _heartbeat_started
+    if not _heartbeat_started:
+        _heartbeat_started = True
+        threading.Thread(target=_heartbeat_loop, name="outfit-job-heartbeat", daemon=True).start()
+        atexit.register(_release_owner)
+
+
+def _release_owner():
+    """On a clean exit, let the next process resume our jobs without waiting out the TTL"""
+    try:
+        with _lock:
+            if _conn is not None:
+                _conn.execute("DELETE FROM owners WHERE id = ?", (OWNER_ID,))
+    except Exception as e:
+        print(f"Job store release error: {e}")
+
+
+def save_job(job):
+    """Insert or update the durable copy of a job record (newest updated_at wins)
+
+    The row is owned by this process, which is the only one running the job.
+    """
+    row = (
+        job['id'], job['kind'], job.get('input_hash'), job['status'], job.get('task_id'),
+        json.dumps(job.get('params') or {}), json.dumps(job.get('result') or []),
+        job.get('info') or "", job.get('message') or "",
+        job['created_at'], job['updated_at'], job.get('finished_at'), OWNER_ID,
+    )
+    updates = ", ".join(f"{column} = excluded.{column}" for column in COLUMNS[1:])
+    try:
+        with _lock:
+            # Writers race from several threads; never let an older snapshot win
+            _connection().execute(
+                f"INSERT INTO jobs ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))}) "
+                f"ON CONFLICT(id) DO UPDATE SET {updates} WHERE excluded.updated_at >= jobs.updated_at",
+                row,
+            )
+    except Exception as e:
+        print(f"Job store save error: {e}")
+
+
+def _to_job(row):
+    job = dict(zip(COLUMNS, row))
+    job['params'] = json.loads(job['params'])
+    job['result'] = json.loads(job['result'])
+    return job
+
+
+def load_job(job_id):
+    """Return the stored job record, or None"""
+    try:
+        with _lock:
+            row = _connection().execute(
+                f"SELECT {', '.join(COLUMNS)} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+    except Exception as e:
+        print(f"Job store load error: {e}")
+        return None
+    return _to_job(row) if row else None
+
+
+def claim_orphaned_jobs(now=None):
+    """Take over unfinished jobs whose owning process is gone and return them
+
+    A job belongs to a live process while its owner keeps heartbeating, so
+    processes sharing the store never pick up each other's running jobs. Each row is claimed with a compare-and-set on its
+    owner, so concurrent restarts cannot both resume the same job.
+    """
+    cutoff = (now or time.time()) - JOB_OWNER_TTL_S
+    claimed = []
+    try:
+        with _lock:
+            conn = _connection()
+            rows = conn.execute(
+                f"SELECT {', '.join('jobs.' + column for column in COLUMNS)} FROM jobs "
+                f"LEFT JOIN owners ON owners.id = jobs.owner "
+                f"WHERE jobs.finished_at IS NULL AND jobs.owner IS NOT ? "
+                f"AND (owners.heartbeat_at IS NULL OR owners.heartbeat_at < ?) ORDER BY jobs.created_at",
+                (OWNER_ID, cutoff),
+            ).fetchall()
+            for row in rows:
+                job = _to_job(row)
+                cursor = conn.execute("UPDATE jobs SET owner = ? WHERE id = ? AND owner IS ?",
+                                      (OWNER_ID, job['id'], job['owner']))
+                if cursor.rowcount == 1:
+                    job['owner'] = OWNER_ID
+                    claimed.append(job)
+    except Exception as e:
+        print(f"Job store claim error: {e}")
+    return claimed
+
+
+def prune_jobs(now=None):
+    """Drop finished jobs older than the retention window"""
+    cutoff = (now or time.time()) - JOB_STORE_RETENTION_S
+    try:
+        with _lock:
+            _connection().execute("DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?", (cutoff,))
+    except Exception as e:
+        print(f"Job store prune error: {e}")
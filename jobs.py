@@ -0,0 +1,679 @@
+import os
+import time
+import uuid
+import random
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import (
+    upload_pose_img,
+    publicClothSwap,
+    public_pose_changer,
+    download_result_image,
+    is_http_resource_accessible,
+)
+from poller import watch_task
+from metrics import inc, observe
+from admission import admit, queue_position
+from breaker import is_endpoint_available
+from thumbnails import file_sha1
+from result_cache import result_cache_key, get_cached_result, store_result
+from job_store import save_job, load_job, claim_orphaned_jobs, prune_jobs, JOB_OWNER_HEARTBEAT_S
+
+
+# Job engine configuration
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', '16'))
+JOB_RETENTION_S = 60 * 60
+BATCH_MAX_CONCURRENCY = int(os.environ.get('BATCH_MAX_CONCURRENCY', '4'))
+DOWNLOAD_WORKERS = int(os.environ.get('DOWNLOAD_WORKERS', '8'))
+TRYON_TIMEOUT_S = 180
+POSE_TIMEOUT_S = 120
+
+# Job states
+QUEUED = 'QUEUED'
+UPLOADING = 'UPLOADING'
+SUBMITTING = 'SUBMITTING'
+PROCESSING = 'PROCESSING'
+SUCCEED = 'SUCCEED'
+FAILED = 'FAILED'
+TIMEOUT = 'TIMEOUT'
+FINISHED_STATES = (SUCCEED, FAILED, TIMEOUT)
+
+MSG_BUSY = "🚦 The service is busy right now. Please try again in a minute."
+
+_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="outfit-job")
+# Separate pool: multi-output downloads are started from job workers and must not wait on them
+_download_executor = ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS, thread_name_prefix="outfit-download")
+_jobs = {}
+# Single-flight: identical requests in flight map to one shared job id
+_inflight = {}
+# Callbacks run once when a job reaches a terminal state
+_finish_hooks = {}
+_batches = {}
+_lock = threading.Lock()
+# Job fields whose change is written through to the durable job store
+DURABLE_FIELDS = ('status', 'task_id', 'result')
+_resumed = False
+
+
+def _new_job(kind, flight_key=None, params=None):
+    """Register a new job record and return (job_id, created)
+
+    If an identical request (same flight_key) is still running, its job id is
+    returned with created=False so every caller shares one upstream job.
+    params holds what is needed to resume the job after a restart.
+    """
+    now = time.time()
+    with _lock:
+        _purge_finished(now)
+        if flight_key is not None and flight_key in _inflight:
+            return _inflight[flight_key], False
+        job_id = uuid.uuid4().hex
+        if flight_key is not None:
+            _inflight[flight_key] = job_id
+        job = _jobs[job_id] = {
+            'id': job_id,
+            'kind': kind,
+            'status': QUEUED,
+            'progress': 0,
+            'message': "⏳ Waiting for a free worker...",
+            'task_id': None,
+            'result': [],
+            'info': "",
+            'status_calls': 0,
+            'created_at': now,
+            'updated_at': now,
+            'finished_at': None,
+            'flight_key': flight_key,
+            'input_hash': hashlib.sha1(repr(flight_key).encode("utf-8")).hexdigest() if flight_key else None,
+            'params': params or {},
+            'admission_ticket': None,
+        }
+        record = dict(job)
+    save_job(record)
+    return job_id, True
+
+
+def _purge_finished(now):
+    """Drop finished jobs nobody reattached to within the retention window"""
+    expired = [
+        job_id for job_id, job in _jobs.items()
+        if job['finished_at'] is not None and now - job['finished_at'] > JOB_RETENTION_S
+    ]
+    for job_id in expired:
+        del _jobs[job_id]
+    expired = [
+        batch_id for batch_id, batch in _batches.items()
+        if batch['finished_at'] is not None and now - batch['finished_at'] > JOB_RETENTION_S
+    ]
+    for batch_id in expired:
+        del _batches[batch_id]
+
+
+def _update(job_id, **fields):
+    """Update a job record in place
+
+    State changes are written through to the job store; progress-only
+    updates from polling stay in memory.
+    """
+    now = time.time()
+    hooks = []
+    record = None
+    with _lock:
+        job = _jobs.get(job_id)
+        if job is None:
+            return
+        job.update(fields)
+        job['updated_at'] = now
+        if job['status'] in FINISHED_STATES and job['finished_at'] is None:
+            job['finished_at'] = now
+            if _inflight.get(job['flight_key']) == job_id:
+                del _inflight[job['flight_key']]
+            hooks = _finish_hooks.pop(job_id, [])
+            inc('jobs_total', kind=job['kind'], status=job['status'])
+        if any(field in fields for field in DURABLE_FIELDS):
+            record = dict(job)
+    if record is not None:
+        save_job(record)
+    _run_hooks(job_id, hooks)
+
+
+def _run_hooks(job_id, hooks):
+    for hook in hooks:
+        try:
+            hook(job_id)
+        except Exception as e:
+            print(f"Job {job_id} finish hook error: {e}")
+
+
+def add_finish_hook(job_id, hook):
+    """Call hook(job_id) once the job finishes (immediately if it already has)"""
+    with _lock:
+        job = _jobs.get(job_id)
+        if job is not None and job['finished_at'] is None:
+            _finish_hooks.setdefault(job_id, []).append(hook)
+            return
+    _run_hooks(job_id, [hook])
+
+
+def _observe_queue_wait(job_id):
+    """Record how long a job sat in the executor queue before a worker picked it up"""
+    with _lock:
+        job = _jobs.get(job_id)
+        created_at = job['created_at'] if job else None
+    if created_at is not None:
+        observe('stage_seconds', time.time() - created_at, stage='queue_wait')
+
+
+def _start_admitted(job_id, endpoint, worker, *args):
+    """Run worker on the job pool once the endpoint's admission controller lets it through
+
+    The job fails immediately with MSG_BUSY when the endpoint's circuit
+    breaker is open or the wait queue is full.
+    """
+    if not is_endpoint_available(endpoint):
+        _update(job_id, status=FAILED, message=MSG_BUSY)
+        return
+    ticket = admit(endpoint, lambda: _executor.submit(worker, job_id, *args))
+    if ticket is None:
+        _update(job_id, status=FAILED, message=MSG_BUSY)
+    else:
+        _update(job_id, admission_ticket=ticket)
+
+
+def _make_time_id():
+    return int(str(time.time()).replace(".", "")) + random.randint(1000, 9999)
+
+
+def get_job(job_id):
+    """Return a snapshot of the job record, or None if it is unknown"""
+    if not job_id:
+        return None
+    with _lock:
+        job = _jobs.get(job_id)
+        if job is not None:
+            snapshot = dict(job)
+            snapshot['result'] = list(job['result'])
+    if job is None:
+        # Not in memory: finished before a restart, or expired from memory
+        return _stored_job(job_id)
+
+    # Jobs waiting for admission report their live place in the queue
+    position = queue_position(snapshot['admission_ticket']) if snapshot['status'] == QUEUED else None
+    if position is not None:
+        snapshot['queue_position'] = position[0]
+        snapshot['message'] = f"⏳ In queue: position {position[0]} of {position[1]}"
+    return snapshot
+
+
+def _stored_job(job_id):
+    """Snapshot of a job from the job store, or None if its results are gone
+
+    Unfinished jobs belong to another process, or are waiting to be resumed
+    by this one, so they are reported as still running.
+    """
+    job = load_job(job_id)
+    if job is None:
+        return None
+    if job['finished_at'] is None:
+        job.update(progress=50 if job['task_id'] else 0, status_calls=0, flight_key=None, admission_ticket=None)
+        return job
+    if job['status'] == SUCCEED and not all(path and os.path.exists(path) for path in job['result']):
+        return None
+    job.update(progress=100, status_calls=0, flight_key=None, admission_ticket=None)
+    return job
+
+
+def is_job_active(job_id):
+    """Check whether the job exists and has not finished yet"""
+    job = get_job(job_id)
+    return job is not None and job['status'] not in FINISHED_STATES
+
+
+def _tryon_cache_key(pose_image, cloth_id, is_hr):
+    try:
+        return result_cache_key(pose_image, cloth_id, is_hr)
+    except Exception as e:
+        print(f"Result cache key error: {e}")
+        return None
+
+
+def submit_tryon_job(pose_image, cloth_id, is_hr, client_ip, upload_url=None):
+    """Queue a virtual try-on job and return its id immediately
+
+    Repeats of an already rendered (pose image, cloth, tier) finish at once
+    from the result cache without an upstream call, and concurrent identical
+    requests from any session share one running job. New jobs wait their
+    turn in the admission queue for the submit endpoint. Pass upload_url to
+    reuse an image that is already uploaded.
+    """
+    cache_key = _tryon_cache_key(pose_image, cloth_id, is_hr)
+    params = {
+        'pose_image': pose_image, 'cloth_id': cloth_id, 'is_hr': is_hr, 'client_ip': client_ip,
+        'cache_key': cache_key, 'upload_url': upload_url,
+    }
+    cached = get_cached_result(cache_key) if cache_key else None
+    if cached is not None:
+        job_id, _ = _new_job('tryon', params=params)
+        _update(
+            job_id,
+            status=SUCCEED,
+            progress=100,
+            result=[cached],
+            info="✅ Task finished! (cached result)",
+            message="✅ Virtual try-on completed successfully!",
+        )
+        return job_id
+
+    job_id, created = _new_job('tryon', ('tryon', cache_key) if cache_key else None, params)
+    if created:
+        _start_admitted(job_id, 'public_advton', _run_tryon, pose_image, cloth_id, is_hr, client_ip, cache_key, upload_url)
+    return job_id
+
+
+def _pose_change_flight_key(pose_prompt, pose_changer_image):
+    """Identity of a pose change request: image content (or URL) plus prompt"""
+    try:
+        if isinstance(pose_changer_image, str) and os.path.isfile(pose_changer_image):
+            image_key = file_sha1(pose_changer_image)
+        else:
+            image_key = str(pose_changer_image)
+    except Exception as e:
+        print(f"Pose change key error: {e}")
+        return None
+    return ('pose_change', image_key, pose_prompt)
+
+
+def submit_pose_change_job(pose_prompt, pose_changer_image, client_ip):
+    """Queue a pose change job and return its id immediately
+
+    Concurrent identical requests share one running job; new jobs wait their
+    turn in the admission queue for the submit endpoint.
+    """
+    params = {'pose_prompt': pose_prompt, 'pose_changer_image': pose_changer_image, 'client_ip': client_ip}
+    job_id, created = _new_job('pose_change', _pose_change_flight_key(pose_prompt, pose_changer_image), params)
+    if created:
+        _start_admitted(job_id, 'public_comfyui', _run_pose_change, pose_prompt, pose_changer_image, client_ip)
+    return job_id
+
+
+def submit_batch_tryon(pose_image, cloth_ids, is_hr, client_ip, max_concurrency=BATCH_MAX_CONCURRENCY):
+    """Try one photo on several garments and return the batch id immediately
+
+    The photo is uploaded once, then at most max_concurrency try-on jobs run
+    at a time; each finished job starts the next pending one, so no thread
+    waits on the concurrency limit.
+    """
+    batch_id = uuid.uuid4().hex
+    now = time.time()
+    with _lock:
+        _batches[batch_id] = {
+            'id': batch_id,
+            'status': UPLOADING,
+            'message': "⏳ Uploading image...",
+            'pose_image': pose_image,
+            'is_hr': is_hr,
+            'client_ip': client_ip,
+            'upload_url': None,
+            'max_concurrency': max(1, max_concurrency),
+            'pending': list(cloth_ids),
+            'running': 0,
+            'items': [],
+            'created_at': now,
+            'finished_at': None,
+        }
+    _executor.submit(_run_batch, batch_id)
+    return batch_id
+
+
+def _run_batch(batch_id):
+    """Upload the batch photo once (unless every item is cached) and start the fan-out"""
+    with _lock:
+        batch = _batches[batch_id]
+        pose_image, is_hr, client_ip = batch['pose_image'], batch['is_hr'], batch['client_ip']
+        cloth_ids = list(batch['pending'])
+
+    if not is_endpoint_available('public_advton'):
+        _finish_batch(batch_id, FAILED, MSG_BUSY)
+        return
+
+    try:
+        needs_upload = any(
+            get_cached_result(_tryon_cache_key(pose_image, cloth_id, is_hr) or '') is None
+            for cloth_id in cloth_ids
+        )
+        if needs_upload:
+            upload_url = upload_pose_img(client_ip, _make_time_id(), pose_image)
+            if len(upload_url) == 0:
+                _finish_batch(batch_id, FAILED, "❌ Failed to upload image")
+                return
+            with _lock:
+                batch['upload_url'] = upload_url
+    except Exception as e:
+        print(f"Batch {batch_id} error: {e}")
+        _finish_batch(batch_id, FAILED, f"❌ Processing exception: {str(e)}")
+        return
+
+    with _lock:
+        batch['status'] = PROCESSING
+        batch['message'] = "🔄 Trying on selected items..."
+    _batch_next(batch_id)
+
+
+def _batch_next(batch_id, finished_job_id=None):
+    """Start pending batch items up to the concurrency limit"""
+    to_start = []
+    with _lock:
+        batch = _batches.get(batch_id)
+        if batch is None:
+            return
+        if finished_job_id is not None:
+            batch['running'] -= 1
+        while batch['pending'] and batch['running'] < batch['max_concurrency']:
+            to_start.append(batch['pending'].pop(0))
+            batch['running'] += 1
+        done = not batch['pending'] and batch['running'] == 0
+
+    if done:
+        _finish_batch(batch_id, SUCCEED, "✅ Batch try-on completed!")
+        return
+
+    for cloth_id in to_start:
+        started_at = time.time()
+        job_id = submit_tryon_job(batch['pose_image'], cloth_id, batch['is_hr'], batch['client_ip'],
+                                  upload_url=batch['upload_url'])
+        with _lock:
+            batch['items'].append({'cloth_id': cloth_id, 'job_id': job_id, 'started_at': started_at})
+        add_finish_hook(job_id, lambda finished, b=batch_id: _batch_next(b, finished))
+
+
+def _finish_batch(batch_id, status, message):
+    with _lock:
+        batch = _batches.get(batch_id)
+        if batch is not None and batch['finished_at'] is None:
+            batch.update(status=status, message=message, finished_at=time.time())
+
+
+def get_batch(batch_id):
+    """Return a snapshot of the batch with per-item status, result and latency"""
+    if not batch_id:
+        return None
+    with _lock:
+        batch = _batches.get(batch_id)
+        if batch is None:
+            return None
+        items = []
+        for item in batch['items']:
+            job = _jobs.get(item['job_id'])
+            finished_at = job['finished_at'] if job else None
+            items.append({
+                'cloth_id': item['cloth_id'],
+                'job_id': item['job_id'],
+                'status': job['status'] if job else FAILED,
+                'message': job['message'] if job else "",
+                'result': list(job['result']) if job else [],
+                'latency': finished_at - item['started_at'] if finished_at else None,
+            })
+        return {
+            'id': batch['id'],
+            'status': batch['status'],
+            'message': batch['message'],
+            'total': len(batch['items']) + len(batch['pending']),
+            'done': sum(1 for item in items if item['status'] in FINISHED_STATES),
+            'items': items,
+            'finished': batch['finished_at'] is not None,
+            'elapsed': (batch['finished_at'] or time.time()) - batch['created_at'],
+        }
+
+
+def is_batch_active(batch_id):
+    """Check whether the batch exists and still has items running or pending"""
+    batch = get_batch(batch_id)
+    return batch is not None and not batch['finished']
+
+
+def _run_tryon(job_id, pose_image, cloth_id, is_hr, client_ip, cache_key=None, upload_url=None):
+    """Worker body for a try-on job: upload, submit and hand off to the poller"""
+    _observe_queue_wait(job_id)
+    try:
+        if not upload_url:
+            _update(job_id, status=UPLOADING, progress=10, message="⏳ Uploading image...")
+            upload_url = upload_pose_img(client_ip, _make_time_id(), pose_image)
+            if len(upload_url) == 0:
+                _update(job_id, status=FAILED, message="❌ Failed to upload image")
+                return
+
+        _update(job_id, status=SUBMITTING, progress=30, message="🔄 Submitting task...")
+        public_res = publicClothSwap(upload_url, cloth_id, is_hr=is_hr)
+        if public_res is None:
+            _update(job_id, status=FAILED,
+                    message="❌ Failed to submit task" if is_endpoint_available('public_advton') else MSG_BUSY)
+            return
+
+        mid_result = public_res['mid_result'] if is_http_resource_accessible(public_res['mid_result']) else None
+        _update(
+            job_id,
+            status=PROCESSING,
+            progress=50,
+            task_id=public_res['id'],
+            mid_result=mid_result,
+            message=f"⏳ Processing... Task ID: {public_res['id']}",
+        )
+
+        watch_task('status_advton', public_res['id'], lambda *args: _on_tryon_status(job_id, cache_key, *args), TRYON_TIMEOUT_S)
+    except Exception as e:
+        print(f"Try-on job {job_id} error: {e}")
+        _update(job_id, status=FAILED, message=f"❌ Processing exception: {str(e)}")
+
+
+def _on_tryon_status(job_id, cache_key, event, state, stats):
+    """Poller callback for a try-on task"""
+    if event == 'update':
+        progress = int(min(50 + (stats['elapsed'] / TRYON_TIMEOUT_S) * 45, 95))
+        if state is None:
+            _update(job_id, progress=progress, status_calls=stats['status_calls'],
+                    message="⚠️ Task query failed, retrying...")
+        else:
+            _update(job_id, progress=progress, status_calls=stats['status_calls'],
+                    message=f"🔄 Processing... Query {stats['status_calls']}")
+        return
+
+    print(f"Job {job_id} {event} after {stats['status_calls']} status calls")
+    observe('stage_seconds', stats['elapsed'], stage='upstream_processing')
+    if event == 'timeout':
+        _update(job_id, status=TIMEOUT, message="⏰ Task timeout. Please try again.")
+    elif state['status'] == 'SUCCEED':
+        # Downloading blocks, so keep it off the shared poll loop
+        _executor.submit(_finish_tryon, job_id, state, cache_key)
+    else:
+        _update(job_id, status=FAILED, message=f"❌ Task failed: {state['msg']}")
+
+
+def _finish_tryon(job_id, state, cache_key=None):
+    """Download the try-on result, cache it and complete the job"""
+    try:
+        timestamp = int(time.time() * 1000)
+        local_result = download_result_image(state['output1'] + f"?t={timestamp}")
+        if not local_result or not os.path.exists(local_result):
+            # Size limits and integrity checks reject a download by returning None
+            _update(job_id, status=FAILED, message="❌ Failed to download the result. Please try again.")
+            return
+        if cache_key:
+            store_result(cache_key, local_result)
+        _update(
+            job_id,
+            status=SUCCEED,
+            progress=100,
+            result=[local_result],
+            info=f"✅ Task finished! {state['msg']}",
+            message="✅ Virtual try-on completed successfully!",
+        )
+    except Exception as e:
+        print(f"Try-on job {job_id} error: {e}")
+        _update(job_id, status=FAILED, message=f"❌ Processing exception: {str(e)}")
+
+
+def _run_pose_change(job_id, pose_prompt, pose_changer_image, client_ip):
+    """Worker body for a pose change job: upload, submit and hand off to the poller"""
+    _observe_queue_wait(job_id)
+    try:
+        _update(job_id, status=UPLOADING, progress=20, message="⏳ Uploading image...")
+
+        # Upload image if it's a local file
+        if isinstance(pose_changer_image, str) and not pose_changer_image.startswith('http'):
+            image_url = upload_pose_img(client_ip, _make_time_id(), pose_changer_image)
+            if not image_url:
+                _update(job_id, status=FAILED, message="❌ Image upload failed!")
+                return
+        else:
+            image_url = pose_changer_image
+
+        _update(job_id, status=SUBMITTING, progress=40, message="🔄 Submitting pose change request...")
+        pose_result = public_pose_changer(image_url, pose_prompt)
+        if pose_result is None:
+            _update(job_id, status=FAILED,
+                    message="❌ Pose change request failed!" if is_endpoint_available('public_comfyui') else MSG_BUSY)
+            return
+
+        _update(
+            job_id,
+            status=PROCESSING,
+            progress=60,
+            task_id=pose_result['id'],
+            message=f"⏳ Processing... Task ID: {pose_result['id']}",
+        )
+
+        watch_task('status_comfyui', pose_result['id'], lambda *args: _on_pose_status(job_id, *args), POSE_TIMEOUT_S)
+    except Exception as e:
+        print(f"Pose change job {job_id} error: {e}")
+        _update(job_id, status=FAILED, message=f"❌ Processing exception: {str(e)}")
+
+
+def _on_pose_status(job_id, event, state, stats):
+    """Poller callback for a pose change task"""
+    if event == 'update':
+        progress = int(min(60 + (stats['elapsed'] / POSE_TIMEOUT_S) * 35, 95))
+        if state is None:
+            _update(job_id, progress=progress, status_calls=stats['status_calls'])
+        else:
+            _update(job_id, progress=progress, status_calls=stats['status_calls'],
+                    message=f"🔄 Processing... Query {stats['status_calls']}")
+        return
+
+    print(f"Job {job_id} {event} after {stats['status_calls']} status calls")
+    observe('stage_seconds', stats['elapsed'], stage='upstream_processing')
+    if event == 'timeout':
+        _update(job_id, status=TIMEOUT, message="⏰ Pose change timeout!")
+    elif state['status'] == 'SUCCEED':
+        _executor.submit(_finish_pose_change, job_id, state)
+    else:
+        _update(job_id, status=FAILED, message=f"❌ Pose change failed: {state.get('msg', '')}")
+
+
+def _finish_pose_change(job_id, result):
+    """Download every pose change output and complete the job"""
+    try:
+        # Fetch the outputs concurrently so completion waits for the slowest, not the sum
+        downloads = []
+        for j in range(1, 4):
+            output_key = f'output{j}'
+            if output_key in result and result[output_key] and result[output_key].strip():
+                timestamp = int(time.time() * 1000)
+                img_url = result[output_key] + f"?t={timestamp}"
+                filename = f"pose_result_{j}_{int(time.time())}_{job_id[:8]}.jpg"
+                downloads.append(_download_executor.submit(download_result_image, img_url, filename))
+        output_images = [local_img for local_img in (d.result() for d in downloads)
+                         if local_img and os.path.exists(local_img)]
+        if not output_images:
+            _update(job_id, status=FAILED, message="❌ Failed to download the pose change results. Please try again.")
+            return
+        _update(
+            job_id,
+            status=SUCCEED,
+            progress=100,
+            result=output_images,
+            info=f"✅ Pose change completed! {result.get('msg', '')}",
+            message="✅ Pose change completed successfully!",
+        )
+    except Exception as e:
+        print(f"Pose change job {job_id} error: {e}")
+        _update(job_id, status=FAILED, message=f"❌ Processing exception: {str(e)}")
+
+
+def resume_jobs():
+    """Start picking up jobs that dead processes left unfinished (once per process)
+
+    Only jobs whose owning process stopped heartbeating are claimed; jobs of
+    live processes sharing the store are left to them. The check repeats in
+    the background, since a process killed just before a restart still looks
+    alive for JOB_OWNER_TTL_S and others sharing the store may die later.
+
+    Jobs that already have an upstream task id go back to polling, so their
+    result is not paid for twice. Jobs that never reached the submit call are
+    started again. A job interrupted during submission cannot tell whether
+    the backend accepted it, so it is failed and the user asked to retry.
+    """
+    global _resumed
+    with _lock:
+        if _resumed:
+            return
+        _resumed = True
+    threading.Thread(target=_resume_loop, name="outfit-job-resume", daemon=True).start()
+
+
+def _resume_loop():
+    prune_jobs()
+    while True:
+        for stored in claim_orphaned_jobs():
+            with _lock:
+                if stored['id'] in _jobs:
+                    continue
+            try:
+                _resume_job(stored)
+            except Exception as e:
+                print(f"Job {stored['id']} resume error: {e}")
+                _update(stored['id'], status=FAILED, message=f"❌ Processing exception: {str(e)}")
+        time.sleep(JOB_OWNER_HEARTBEAT_S)
+
+
+def _resume_job(stored):
+    job_id, kind, params = stored['id'], stored['kind'], stored['params']
+    if kind == 'tryon':
+        flight_key = ('tryon', params['cache_key']) if params.get('cache_key') else None
+    else:
+        flight_key = _pose_change_flight_key(params['pose_prompt'], params['pose_changer_image'])
+
+    with _lock:
+        _jobs[job_id] = dict(
+            stored,
+            progress=50 if stored['task_id'] else 0,
+            status_calls=0,
+            flight_key=flight_key,
+            admission_ticket=None,
+        )
+        if flight_key is not None and flight_key not in _inflight:
+            _inflight[flight_key] = job_id
+    print(f"Resuming {kind} job {job_id} in state {stored['status']}")
+
+    if stored['task_id']:
+        _update(job_id, status=PROCESSING, message=f"⏳ Processing... Task ID: {stored['task_id']}")
+        if kind == 'tryon':
+            watch_task('status_advton', stored['task_id'],
+                       lambda *args: _on_tryon_status(job_id, params.get('cache_key'), *args), TRYON_TIMEOUT_S)
+        else:
+            watch_task('status_comfyui', stored['task_id'],
+                       lambda *args: _on_pose_status(job_id, *args), POSE_TIMEOUT_S)
+    elif stored['status'] == SUBMITTING:
+        _update(job_id, status=FAILED, message="⚠️ The server restarted while submitting your task. Please try again.")
+    elif kind == 'tryon':
+        if not os.path.exists(params['pose_image']):
+            _update(job_id, status=FAILED, message="❌ Failed to upload image")
+            return
+        _update(job_id, status=QUEUED)
+        _start_admitted(job_id, 'public_advton', _run_tryon, params['pose_image'], params['cloth_id'],
+                        params['is_hr'], params['client_ip'], params.get('cache_key'), params.get('upload_url'))
+    else:
+        _update(job_id, status=QUEUED)
+        _start_admitted(job_id, 'public_comfyui', _run_pose_change, params['pose_prompt'],
+                        params['pose_changer_image'], params['client_ip'])
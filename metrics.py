@@ -0,0 +1,238 @@
+import os
+import json
+import time
+import bisect
+import threading
+import functools
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+# Metrics configuration
+# METRICS_PORT serves /metrics and /health on localhost; METRICS_FILE is rewritten every
+# METRICS_FILE_INTERVAL_S seconds (e.g. for the node_exporter textfile collector)
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+METRICS_HOST = os.environ.get('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.environ.get('METRICS_PORT', '0'))
+METRICS_FILE = os.environ.get('METRICS_FILE', '')
+METRICS_FILE_INTERVAL_S = float(os.environ.get('METRICS_FILE_INTERVAL_S', '15'))
+METRICS_PREFIX = "outfit"
+
+# Histogram bucket upper bounds in seconds, from sub-millisecond decodes to slow jobs
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+HELP = {
+    'stage_seconds': "Duration of each request stage",
+    'stage_errors_total': "Stage executions that raised an exception",
+    'http_request_seconds': "Upstream HTTP request duration by endpoint",
+    'http_requests_total': "Upstream HTTP requests by endpoint and outcome",
+    'jobs_total': "Finished background jobs by kind and final status",
+    'admission_total': "Upstream submissions by endpoint and admission outcome",
+    'breaker_state': "Circuit breaker state per endpoint (0 closed, 1 half-open, 2 open)",
+    'breaker_transitions_total': "Circuit breaker state changes by endpoint and new state",
+    'storage_evicted_files_total': "Files removed by the storage sweeper",
+    'storage_evicted_bytes_total': "Bytes freed by the storage sweeper",
+}
+
+# (name, labels) -> value; labels is a sorted tuple of (key, value) pairs
+_counters = {}
+# (name, labels) -> [bucket counts..., +Inf count], sum
+_histograms = {}
+# (name, labels) -> last value
+_gauges = {}
+# name -> callable returning a JSON-serializable health section
+_health_providers = {}
+_lock = threading.Lock()
+_exporter_started = False
+
+
+def _labels(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def inc(name, value=1, **labels):
+    """Add value to the counter name{labels}"""
+    if not METRICS_ENABLED:
+        return
+    key = (name, _labels(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name, seconds, **labels):
+    """Record one observation in the histogram name{labels}"""
+    if not METRICS_ENABLED:
+        return
+    key = (name, _labels(labels))
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = [[0] * (len(DURATION_BUCKETS) + 1), 0.0]
+        hist[0][bisect.bisect_left(DURATION_BUCKETS, seconds)] += 1
+        hist[1] += seconds
+
+
+def set_gauge(name, value, **labels):
+    """Set the gauge name{labels} to value"""
+    if not METRICS_ENABLED:
+        return
+    with _lock:
+        _gauges[(name, _labels(labels))] = value
+
+
+def register_health(name, provider):
+    """Add a section to the /health report; provider() is called on every request"""
+    _health_providers[name] = provider
+
+
+def health_report():
+    """Collect every registered health section"""
+    report = {}
+    for name, provider in list(_health_providers.items()):
+        try:
+            report[name] = provider()
+        except Exception as e:
+            report[name] = {'error': str(e)}
+    return report
+
+
+@contextmanager
+def span(stage):
+    """Time a stage of the request path, counting exceptions that escape it"""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        inc('stage_errors_total', stage=stage)
+        raise
+    finally:
+        observe('stage_seconds', time.perf_counter() - start, stage=stage)
+
+
+def timed(stage):
+    """Decorator form of span()"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_http(endpoint, seconds, outcome):
+    """Record one upstream HTTP call; outcome is the status code or an error name"""
+    observe('http_request_seconds', seconds, endpoint=endpoint)
+    inc('http_requests_total', endpoint=endpoint, outcome=outcome)
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+def render_prometheus():
+    """Return every metric in the Prometheus text exposition format"""
+    with _lock:
+        counters = sorted(_counters.items())
+        gauges = sorted(_gauges.items())
+        histograms = sorted((key, (list(hist[0]), hist[1])) for key, hist in _histograms.items())
+
+    lines = []
+    typed = set()
+    for (name, labels), value in counters:
+        full_name = f"{METRICS_PREFIX}_{name}"
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# HELP {full_name} {HELP.get(name, name)}")
+            lines.append(f"# TYPE {full_name} counter")
+        lines.append(f"{full_name}{_format_labels(labels)} {value}")
+
+    for (name, labels), value in gauges:
+        full_name = f"{METRICS_PREFIX}_{name}"
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# HELP {full_name} {HELP.get(name, name)}")
+            lines.append(f"# TYPE {full_name} gauge")
+        lines.append(f"{full_name}{_format_labels(labels)} {value}")
+
+    for (name, labels), (counts, total) in histograms:
+        full_name = f"{METRICS_PREFIX}_{name}"
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# HELP {full_name} {HELP.get(name, name)}")
+            lines.append(f"# TYPE {full_name} histogram")
+        cumulative = 0
+        for bound, count in zip(DURATION_BUCKETS, counts):
+            cumulative += count
+            lines.append(f"{full_name}_bucket{_format_labels(labels, [('le', bound)])} {cumulative}")
+        cumulative += counts[-1]
+        lines.append(f"{full_name}_bucket{_format_labels(labels, [('le', '+Inf')])} {cumulative}")
+        lines.append(f"{full_name}_sum{_format_labels(labels)} {total:.6f}")
+        lines.append(f"{full_name}_count{_format_labels(labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        path = self.path.split('?')[0]
+        if path == '/metrics':
+            body = render_prometheus().encode("utf-8")
+            content_type = "text/plain; version=0.0.4"
+        elif path == '/health':
+            body = json.dumps(health_report(), indent=2).encode("utf-8")
+            content_type = "application/json"
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def write_metrics_file(path=None):
+    """Atomically rewrite the metrics file"""
+    path = path or METRICS_FILE
+    try:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(render_prometheus())
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"Metrics file write error: {e}")
+
+
+def _file_writer_loop():
+    while True:
+        time.sleep(METRICS_FILE_INTERVAL_S)
+        write_metrics_file()
+
+
+def start_metrics_exporter():
+    """Start the configured exporters once per process (no-op when none is configured)"""
+    global _exporter_started
+    with _lock:
+        if _exporter_started or not METRICS_ENABLED:
+            return
+        _exporter_started = True
+
+    if METRICS_PORT:
+        try:
+            server = ThreadingHTTPServer((METRICS_HOST, METRICS_PORT), _MetricsHandler)
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, name="outfit-metrics", daemon=True).start()
+            print(f"Metrics served on http://{METRICS_HOST}:{METRICS_PORT}/metrics (health on /health)")
+        except OSError as e:
+            # Another Streamlit process on this host already owns the port
+            print(f"Metrics exporter error: {e}")
+    if METRICS_FILE:
+        threading.Thread(target=_file_writer_loop, name="outfit-metrics-file", daemon=True).start()
@@ -0,0 +1,251 @@
+"""Local stand-in for the UKAPIURL backend, for load tests and offline runs
+
+Implements /upload (plus the PUT target it hands out), /public_advton,
+/status_advton, /public_comfyui and /status_comfyui with configurable
+processing-time distribution, failure rates and result images.
+
+    python mock_server.py [--port 8765] [--median-s 8] [--sigma 0.5] [--fail-rate 0.02]
+
+then point the app at it with UKAPIURL=http://127.0.0.1:8765.
+"""
+import os
+import json
+import math
+import time
+import uuid
+import random
+import argparse
+import threading
+from collections import OrderedDict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, unquote
+
+
+proj_dir = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_RESULT_DIR = os.path.join(proj_dir, 'Datas', 'Clothimgs')
+MAX_STORED_BLOBS = 1000
+
+
+class MockBackend:
+    """State and behaviour of the mock API, shared by all request handlers"""
+
+    def __init__(self, median_s=8.0, sigma=0.5, fail_rate=0.0, submit_error_rate=0.0,
+                 status_error_rate=0.0, api_latency_s=0.0, result_dir=DEFAULT_RESULT_DIR, seed=None):
+        self.median_s = median_s
+        self.sigma = sigma
+        self.fail_rate = fail_rate
+        self.submit_error_rate = submit_error_rate
+        self.status_error_rate = status_error_rate
+        self.api_latency_s = api_latency_s
+        self.random = random.Random(seed)
+        self.results = sorted(
+            os.path.join(result_dir, f) for f in os.listdir(result_dir)
+            if f.lower().endswith(('.jpg', '.jpeg', '.png'))
+        ) if os.path.isdir(result_dir) else []
+        self.tasks = {}
+        self.blobs = OrderedDict()
+        self.counters = {}
+        self.lock = threading.Lock()
+
+    def count(self, name):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + 1
+
+    def sample_duration(self):
+        """Processing time drawn from a log-normal distribution around median_s"""
+        with self.lock:
+            return self.median_s * math.exp(self.random.gauss(0, self.sigma))
+
+    def chance(self, rate):
+        with self.lock:
+            return self.random.random() < rate
+
+    def create_task(self, kind, outputs):
+        task_id = uuid.uuid4().hex
+        done_at = time.time() + self.sample_duration()
+        failed = self.chance(self.fail_rate)
+        with self.lock:
+            self.tasks[task_id] = {'kind': kind, 'outputs': outputs, 'done_at': done_at, 'failed': failed}
+        return task_id
+
+    def task_state(self, task_id, base_url):
+        with self.lock:
+            task = self.tasks.get(task_id)
+        if task is None:
+            return {'status': 'FAILED', 'msg': 'unknown task'}
+        if time.time() < task['done_at']:
+            return {'status': 'PROCESSING', 'msg': ''}
+        if task['failed']:
+            return {'status': 'FAILED', 'msg': 'mock failure'}
+        state = {'status': 'SUCCEED', 'msg': 'mock result'}
+        for i in range(task['outputs']):
+            state[f'output{i + 1}'] = f"{base_url}/results/{self.pick_result()}"
+        return state
+
+    def pick_result(self):
+        with self.lock:
+            return os.path.basename(self.random.choice(self.results)) if self.results else 'missing.jpg'
+
+    def put_blob(self, name, data):
+        with self.lock:
+            self.blobs[name] = data
+            while len(self.blobs) > MAX_STORED_BLOBS:
+                self.blobs.popitem(last=False)
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    backend = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _send(self, status, body=b"", content_type="application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def _send_json(self, payload, status=200):
+        self._send(status, json.dumps(payload).encode("utf-8"))
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _read_json(self):
+        try:
+            return json.loads(self._read_body() or b"{}")
+        except ValueError:
+            return {}
+
+    def do_POST(self):
+        backend = self.backend
+        path = urlparse(self.path).path
+        body = self._read_json()
+        backend.count(path)
+        if backend.api_latency_s:
+            time.sleep(backend.api_latency_s)
+
+        if path == '/upload':
+            name = body.get('input1') or f"{uuid.uuid4().hex}.jpg"
+            self._send_json({'upload1': f"{self._base_url()}/blob/{name}"})
+        elif path in ('/public_advton', '/public_comfyui'):
+            if backend.chance(backend.submit_error_rate):
+                self._send_json({'msg': 'mock submit error'}, status=500)
+                return
+            kind = 'advton' if path == '/public_advton' else 'comfyui'
+            task_id = backend.create_task(kind, 1 if kind == 'advton' else 3)
+            response = {'id': task_id, 'msg': 'queued'}
+            if kind == 'advton':
+                response['mid_result'] = f"{self._base_url()}/blob/mid_{task_id}.jpg"
+            self._send_json(response)
+        elif path in ('/status_advton', '/status_comfyui'):
+            if backend.chance(backend.status_error_rate):
+                self._send_json({'msg': 'mock status error'}, status=503)
+                return
+            self._send_json(backend.task_state(body.get('id'), self._base_url()))
+        else:
+            self._send_json({'msg': 'not found'}, status=404)
+
+    def do_PUT(self):
+        path = urlparse(self.path).path
+        self.backend.count('PUT /blob')
+        data = self._read_body()
+        if not path.startswith('/blob/'):
+            self._send_json({'msg': 'not found'}, status=404)
+            return
+        self.backend.put_blob(unquote(path[len('/blob/'):]), data)
+        self._send(200)
+
+    def do_GET(self):
+        backend = self.backend
+        path = urlparse(self.path).path
+        backend.count(f"{self.command} /{path.split('/')[1]}")
+        if path.startswith('/results/'):
+            name = os.path.basename(unquote(path[len('/results/'):]))
+            matches = [p for p in backend.results if os.path.basename(p) == name]
+            if not matches:
+                self._send_json({'msg': 'not found'}, status=404)
+                return
+            with open(matches[0], 'rb') as f:
+                self._send(200, f.read(), "image/jpeg")
+        elif path.startswith('/blob/'):
+            with backend.lock:
+                data = backend.blobs.get(unquote(path[len('/blob/'):]))
+            if data is None:
+                self._send_json({'msg': 'not found'}, status=404)
+            else:
+                self._send(200, data, "image/jpeg")
+        else:
+            self._send_json({'msg': 'not found'}, status=404)
+
+    do_HEAD = do_GET
+
+
+def make_server(host="127.0.0.1", port=8765, **backend_options):
+    """Create (but do not start) a mock server; port 0 picks a free port"""
+    handler = type('BoundMockHandler', (MockHandler,), {'backend': MockBackend(**backend_options)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_in_thread(host="127.0.0.1", port=0, **backend_options):
+    """Start a mock server in a daemon thread and return (server, base_url)"""
+    server = make_server(host, port, **backend_options)
+    threading.Thread(target=server.serve_forever, name="outfit-mock-api", daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}"
+
+
+def add_backend_arguments(parser):
+    """Register the mock behaviour options on an argparse parser"""
+    parser.add_argument('--median-s', type=float, default=8.0, help="median processing time")
+    parser.add_argument('--sigma', type=float, default=0.5, help="log-normal spread of processing time")
+    parser.add_argument('--fail-rate', type=float, default=0.0, help="fraction of tasks ending FAILED")
+    parser.add_argument('--submit-error-rate', type=float, default=0.0, help="fraction of submits answering 500")
+    parser.add_argument('--status-error-rate', type=float, default=0.0, help="fraction of status calls answering 503")
+    parser.add_argument('--api-latency-ms', type=float, default=0.0, help="added latency per API call")
+    parser.add_argument('--result-dir', default=DEFAULT_RESULT_DIR)
+    parser.add_argument('--seed', type=int, default=None)
+
+
+def backend_options(args):
+    return {
+        'median_s': args.median_s,
+        'sigma': args.sigma,
+        'fail_rate': args.fail_rate,
+        'submit_error_rate': args.submit_error_rate,
+        'status_error_rate': args.status_error_rate,
+        'api_latency_s': args.api_latency_ms / 1000.0,
+        'result_dir': args.result_dir,
+        'seed': args.seed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8765)
+    add_backend_arguments(parser)
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, **backend_options(args))
+    print(f"Mock API listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
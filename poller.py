@@ -0,0 +1,207 @@
+import os
+import time
+import random
+import bisect
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import getInfRes, get_pose_changer_res
+
+
+# Poller configuration
+POLL_MIN_INTERVAL_S = 0.5
+POLL_MAX_INTERVAL_S = 8.0
+POLL_BACKOFF = 1.5
+POLL_JITTER = 0.2
+POLL_FETCH_WORKERS = int(os.environ.get('POLL_FETCH_WORKERS', '8'))
+# Observed latencies needed before the histogram is trusted over the defaults
+POLL_MIN_SAMPLES = 10
+
+# Status endpoints served by the shared poll loop
+STATUS_FETCHERS = {
+    'status_advton': getInfRes,
+    'status_comfyui': get_pose_changer_res,
+}
+
+# Upstream states that end a watch
+DONE_STATES = ('SUCCEED', 'FAILED')
+
+
+class LatencyHistogram:
+    """Fixed-bucket histogram of observed job latencies in seconds"""
+
+    BOUNDS = (1, 2, 3, 5, 8, 10, 15, 20, 30, 45, 60, 90, 120, 180, 240, 300, 600)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.total = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.BOUNDS, seconds)] += 1
+            self.total += 1
+
+    def quantile(self, q):
+        """Upper bucket bound below which a fraction q of observations fall"""
+        with self._lock:
+            if self.total == 0:
+                return 0.0
+            rank = q * self.total
+            seen = 0
+            for i, count in enumerate(self.counts):
+                seen += count
+                if seen >= rank and count > 0:
+                    return float(self.BOUNDS[i]) if i < len(self.BOUNDS) else float(self.BOUNDS[-1])
+            return float(self.BOUNDS[-1])
+
+
+class _Watch:
+    """One outstanding upstream task, shared by every caller waiting on it"""
+
+    def __init__(self, endpoint, task_id, timeout_s):
+        now = time.time()
+        self.endpoint = endpoint
+        self.task_id = task_id
+        self.started_at = now
+        self.deadline = now + timeout_s
+        self.next_poll = now
+        self.status_calls = 0
+        self.backoff_polls = 0
+        self.in_flight = False
+        self.callbacks = []
+
+    def stats(self):
+        return {
+            'status_calls': self.status_calls,
+            'elapsed': time.time() - self.started_at,
+        }
+
+
+class StatusPoller:
+    """Single background loop polling every outstanding task in the process
+
+    Callers register a task with watch() and get callback(event, state, stats)
+    with event 'update' after every status call, then exactly one of 'done'
+    or 'timeout'. Callbacks run on the fetch pool threads and must return quickly.
+    """
+
+    def __init__(self, fetchers):
+        self.fetchers = fetchers
+        self.histograms = {endpoint: LatencyHistogram() for endpoint in fetchers}
+        self._watches = {}
+        self._cond = threading.Condition()
+        self._fetch_pool = ThreadPoolExecutor(max_workers=POLL_FETCH_WORKERS, thread_name_prefix="outfit-poll")
+        self._thread = threading.Thread(target=self._loop, name="outfit-poller", daemon=True)
+        self._thread.start()
+
+    def watch(self, endpoint, task_id, callback, timeout_s):
+        """Poll task_id on endpoint until it finishes or timeout_s elapses"""
+        key = (endpoint, task_id)
+        with self._cond:
+            watch = self._watches.get(key)
+            if watch is None:
+                watch = _Watch(endpoint, task_id, timeout_s)
+                watch.next_poll = watch.started_at + self._next_delay(watch)
+                self._watches[key] = watch
+            watch.callbacks.append(callback)
+            self._cond.notify()
+
+    def outstanding(self):
+        """Number of distinct upstream tasks being polled"""
+        with self._cond:
+            return len(self._watches)
+
+    def _next_delay(self, watch):
+        """Delay before the next status call for watch
+
+        Polls are held back until the fastest tenth of comparable jobs would
+        have finished, then back off exponentially with jitter.
+        """
+        histogram = self.histograms[watch.endpoint]
+        elapsed = time.time() - watch.started_at
+        if histogram.total >= POLL_MIN_SAMPLES:
+            early = histogram.quantile(0.1)
+            base = min(max(histogram.quantile(0.5) / 10, POLL_MIN_INTERVAL_S), POLL_MAX_INTERVAL_S)
+        else:
+            early = 0.0
+            base = POLL_MIN_INTERVAL_S
+
+        if elapsed < early:
+            delay = min(early - elapsed, POLL_MAX_INTERVAL_S)
+        else:
+            delay = min(base * POLL_BACKOFF ** watch.backoff_polls, POLL_MAX_INTERVAL_S)
+            watch.backoff_polls += 1
+        delay *= 1 + random.uniform(-POLL_JITTER, POLL_JITTER)
+        return max(delay, POLL_MIN_INTERVAL_S)
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                now = time.time()
+                idle = [w for w in self._watches.values() if not w.in_flight]
+                due = [w for w in idle if w.next_poll <= now]
+                if not due:
+                    wake = min((w.next_poll for w in idle), default=now + 60)
+                    self._cond.wait(timeout=max(wake - now, 0.05))
+                    continue
+                for watch in due:
+                    watch.in_flight = True
+
+            # Each status call completes on its own, so one slow task cannot hold up the rest
+            for watch in due:
+                future = self._fetch_pool.submit(self._fetch, watch)
+                future.add_done_callback(lambda f, w=watch: self._dispatch(w, f.result()))
+
+    def _fetch(self, watch):
+        try:
+            return self.fetchers[watch.endpoint](watch.task_id)
+        except Exception as e:
+            print(f"Status poll error for {watch.task_id}: {e}")
+            return None
+
+    def _dispatch(self, watch, state):
+        key = (watch.endpoint, watch.task_id)
+        with self._cond:
+            watch.in_flight = False
+            watch.status_calls += 1
+            finished = state is not None and state.get('status') in DONE_STATES
+            timed_out = not finished and time.time() >= watch.deadline
+            if finished or timed_out:
+                self._watches.pop(key, None)
+            else:
+                watch.next_poll = time.time() + self._next_delay(watch)
+            callbacks = list(watch.callbacks)
+            self._cond.notify()
+
+        stats = watch.stats()
+        if finished and state['status'] == 'SUCCEED':
+            self.histograms[watch.endpoint].observe(stats['elapsed'])
+
+        for callback in callbacks:
+            try:
+                callback('update', state, stats)
+                if finished:
+                    callback('done', state, stats)
+                elif timed_out:
+                    callback('timeout', None, stats)
+            except Exception as e:
+                print(f"Status poll callback error for {watch.task_id}: {e}")
+
+
+_poller = None
+_poller_lock = threading.Lock()
+
+
+def get_poller():
+    """Return the process-wide status poller, starting it on first use"""
+    global _poller
+    with _poller_lock:
+        if _poller is None:
+            _poller = StatusPoller(STATUS_FETCHERS)
+        return _poller
+
+
+def watch_task(endpoint, task_id, callback, timeout_s):
+    """Register a task with the process-wide status poller"""
+    get_poller().watch(endpoint, task_id, callback, timeout_s)
@@ -0,0 +1,221 @@
+"""Region check backed by a local IP-range database
+
+The database is a flat binary file of sorted, non-overlapping IPv4 ranges
+that is memory-mapped and binary-searched, so a lookup costs microseconds
+instead of a network round trip. Verdicts are cached per IP with a TTL.
+The remote realip.cc lookup is only used when REGION_REMOTE_FALLBACK=1.
+
+Build the database from a CSV of start_ip,end_ip,country_code rows (e.g.
+the DB-IP or IP2Location LITE country exports):
+
+    python region.py build ip_ranges.csv [--out Datas/ip_country.bin]
+    python region.py lookup 1.2.3.4
+"""
+import os
+import csv
+import mmap
+import time
+import bisect
+import struct
+import argparse
+import threading
+import ipaddress
+from collections import OrderedDict
+
+from http_client import http_get
+
+
+# Region check configuration
+proj_dir = os.path.dirname(os.path.abspath(__file__))
+REGION_DB_PATH = os.environ.get('REGION_DB_PATH', os.path.join(proj_dir, 'Datas', 'ip_country.bin'))
+BLOCKED_COUNTRY_CODES = frozenset(
+    code.strip().upper() for code in os.environ.get('BLOCKED_COUNTRY_CODES', 'IN,PK,BD').split(',') if code.strip()
+)
+# Country names as returned by the remote lookup, matched as substrings
+BLOCKED_REGIONS = os.environ.get('BLOCKED_REGIONS', "IndiaPakistanBengal")
+REGION_REMOTE_FALLBACK = os.environ.get('REGION_REMOTE_FALLBACK', '0') == '1'
+REGION_CACHE_TTL_S = int(os.environ.get('REGION_CACHE_TTL_S', '3600'))
+REGION_CACHE_SIZE = 10000
+
+# File layout: magic, record count, then records of (start, end, country code)
+DB_MAGIC = b"OFIPDB01"
+DB_HEADER = struct.Struct("<8sI")
+DB_RECORD = struct.Struct("<II2s")
+
+_db = None
+_db_loaded = False
+_db_lock = threading.Lock()
+# ip -> (allowed, expires_at); ordered from least to most recently used
+_verdicts = OrderedDict()
+_verdicts_lock = threading.Lock()
+
+
+class IPRangeDB:
+    """Memory-mapped, binary-searchable table of IPv4 ranges to country codes"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._count = DB_HEADER.unpack_from(self._mm, 0)
+        if magic != DB_MAGIC:
+            raise ValueError(f"{path} is not an IP range database")
+        if DB_HEADER.size + self._count * DB_RECORD.size > len(self._mm):
+            raise ValueError(f"{path} is truncated")
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, i):
+        # Range start of record i, so bisect can search the mapped file directly
+        if not 0 <= i < self._count:
+            raise IndexError(i)
+        return struct.unpack_from("<I", self._mm, DB_HEADER.size + i * DB_RECORD.size)[0]
+
+    def lookup(self, ip):
+        """Return the two-letter country code for an IPv4 address, or None"""
+        try:
+            value = int(ipaddress.IPv4Address(ip))
+        except ValueError:
+            return None
+        i = bisect.bisect_right(self, value) - 1
+        if i < 0:
+            return None
+        start, end, code = DB_RECORD.unpack_from(self._mm, DB_HEADER.size + i * DB_RECORD.size)
+        if value > end:
+            return None
+        return code.decode("ascii")
+
+
+def build_database(csv_path, out_path):
+    """Convert a start_ip,end_ip,country_code CSV into the binary database
+
+    IPv6 rows and malformed lines are skipped. Returns the number of ranges.
+    """
+    ranges = []
+    with open(csv_path, newline='') as f:
+        for row in csv.reader(f):
+            if len(row) < 3:
+                continue
+            try:
+                start = _to_int(row[0])
+                end = _to_int(row[1])
+            except ValueError:
+                # Header row, IPv6 range or garbage
+                continue
+            code = row[2].strip().upper()
+            if len(code) != 2 or end < start:
+                continue
+            ranges.append((start, end, code.encode("ascii")))
+    ranges.sort()
+
+    os.makedirs(os.path.dirname(out_path) or '.', exist_ok=True)
+    tmp_path = f"{out_path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(DB_HEADER.pack(DB_MAGIC, len(ranges)))
+        for record in ranges:
+            f.write(DB_RECORD.pack(*record))
+    os.replace(tmp_path, out_path)
+    return len(ranges)
+
+
+def _to_int(value):
+    value = value.strip()
+    if value.isdigit():
+        number = int(value)
+        if number > 0xFFFFFFFF:
+            raise ValueError(value)
+        return number
+    return int(ipaddress.IPv4Address(value))
+
+
+def get_region_db():
+    """Open the configured database once per process; None if it is missing or invalid"""
+    global _db, _db_loaded
+    if _db_loaded:
+        return _db
+    with _db_lock:
+        if not _db_loaded:
+            if os.path.exists(REGION_DB_PATH):
+                try:
+                    _db = IPRangeDB(REGION_DB_PATH)
+                except Exception as e:
+                    print(f"Region database error: {e}")
+            if _db is None and not REGION_REMOTE_FALLBACK:
+                print(f"Region check warning: no database at {REGION_DB_PATH} and REGION_REMOTE_FALLBACK "
+                      f"is off, so every IP is allowed")
+            _db_loaded = True
+    return _db
+
+
+def _remote_allowed(ip):
+    """Ask realip.cc for the country; allow on any error"""
+    try:
+        ret = http_get('region', f"https://realip.cc/?ip={ip}")
+        nat = ret.json()['country'].lower()
+        allowed = nat not in BLOCKED_REGIONS.lower()
+        print(nat, 'valid' if allowed else 'invalid', ip)
+        return allowed
+    except Exception as e:
+        print(f"Region check error: {e}")
+        return True
+
+
+def _resolve(ip):
+    """Uncached verdict for ip: local database first, then the remote lookup if enabled"""
+    try:
+        address = ipaddress.ip_address(ip)
+    except ValueError:
+        return True
+    if address.is_private or address.is_loopback:
+        return True
+
+    db = get_region_db()
+    if db is not None and address.version == 4:
+        code = db.lookup(ip)
+        if code is not None:
+            return code not in BLOCKED_COUNTRY_CODES
+    if REGION_REMOTE_FALLBACK:
+        return _remote_allowed(ip)
+    return True
+
+
+def is_ip_allowed(ip):
+    """Return False if ip is in a blocked region; unknown addresses are allowed"""
+    now = time.time()
+    with _verdicts_lock:
+        cached = _verdicts.get(ip)
+        if cached is not None and cached[1] > now:
+            _verdicts.move_to_end(ip)
+            return cached[0]
+
+    allowed = _resolve(ip)
+    with _verdicts_lock:
+        _verdicts[ip] = (allowed, now + REGION_CACHE_TTL_S)
+        _verdicts.move_to_end(ip)
+        while len(_verdicts) > REGION_CACHE_SIZE:
+            _verdicts.popitem(last=False)
+    return allowed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help="build the binary database from a CSV")
+    build.add_argument('csv_path')
+    build.add_argument('--out', default=REGION_DB_PATH)
+    lookup = commands.add_parser('lookup', help="look up addresses in the database")
+    lookup.add_argument('ips', nargs='+')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        count = build_database(args.csv_path, args.out)
+        print(f"Wrote {count} ranges to {args.out}")
+    else:
+        for ip in args.ips:
+            db = get_region_db()
+            code = db.lookup(ip) if db is not None else None
+            print(f"{ip}: {code or 'unknown'} ({'allowed' if is_ip_allowed(ip) else 'blocked'})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+import os
+import time
+import shutil
+import hashlib
+import threading
+from collections import OrderedDict
+
+from thumbnails import file_sha1
+
+
+# Result cache configuration
+RESULT_CACHE_DIR = os.path.join("tmp", "result_cache")
+RESULT_CACHE_MAX_BYTES = int(os.environ.get('RESULT_CACHE_MAX_BYTES', str(512 * 1024 * 1024)))
+RESULT_CACHE_TTL_S = int(os.environ.get('RESULT_CACHE_TTL_S', str(7 * 24 * 3600)))
+
+# key -> [path, size, created_at]; ordered from least to most recently used
+_entries = None
+_total_bytes = 0
+_lock = threading.Lock()
+
+
+def result_cache_key(pose_image, cloth_id, is_hr):
+    """Cache key for a try-on: content hash of the pose image plus cloth id and tier"""
+    raw = f"{file_sha1(pose_image)}:{cloth_id}:{int(is_hr)}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _load_entries():
+    """Rebuild the LRU index from disk: mtime is creation, atime is last use"""
+    global _entries, _total_bytes
+    _entries = OrderedDict()
+    _total_bytes = 0
+    if not os.path.isdir(RESULT_CACHE_DIR):
+        return
+    found = []
+    for f in os.listdir(RESULT_CACHE_DIR):
+        if not f.endswith('.jpg'):
+            continue
+        path = os.path.join(RESULT_CACHE_DIR, f)
+        stat = os.stat(path)
+        found.append((stat.st_atime, f[:-4], path, stat.st_size, stat.st_mtime))
+    for _, key, path, size, created_at in sorted(found):
+        _entries[key] = [path, size, created_at]
+        _total_bytes += size
+
+
+def _drop(key):
+    global _total_bytes
+    path, size, _ = _entries.pop(key)
+    _total_bytes -= size
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def get_cached_result(key):
+    """Return the cached result path for key, or None if missing or expired"""
+    with _lock:
+        if _entries is None:
+            _load_entries()
+        entry = _entries.get(key)
+        if entry is None:
+            return None
+        path, _, created_at = entry
+        now = time.time()
+        if now - created_at > RESULT_CACHE_TTL_S or not os.path.exists(path):
+            _drop(key)
+            return None
+        _entries.move_to_end(key)
+        try:
+            os.utime(path, (now, created_at))
+        except OSError:
+            pass
+        return path
+
+
+def store_result(key, src_path):
+    """Copy a finished result into the cache and evict down to the size budget"""
+    global _total_bytes
+    if not src_path or not os.path.exists(src_path):
+        return None
+    try:
+        os.makedirs(RESULT_CACHE_DIR, exist_ok=True)
+        path = os.path.join(RESULT_CACHE_DIR, f"{key}.jpg")
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        shutil.copyfile(src_path, tmp_path)
+        os.replace(tmp_path, path)
+        size = os.path.getsize(path)
+    except Exception as e:
+        print(f"Result cache store error: {e}")
+        return None
+
+    with _lock:
+        if _entries is None:
+            _load_entries()
+        if key in _entries:
+            _total_bytes -= _entries.pop(key)[1]
+        _entries[key] = [path, size, time.time()]
+        _total_bytes += size
+        while _total_bytes > RESULT_CACHE_MAX_BYTES and len(_entries) > 1:
+            _drop(next(iter(_entries)))
+    return path
@@ -0,0 +1,54 @@
+import os
+import json
+import time
+
+
+# Set STARTUP_PROFILE=1 to report import and first-render times once per process
+STARTUP_PROFILE = os.environ.get('STARTUP_PROFILE', '0') == '1'
+STARTUP_PROFILE_PATH = os.environ.get('STARTUP_PROFILE_PATH', os.path.join('tmp', 'startup_profile.jsonl'))
+
+_marks = {}
+_durations = {}
+_reported = False
+
+
+def mark(name):
+    """Record the first time the named startup point is reached"""
+    _marks.setdefault(name, time.perf_counter())
+
+
+def record_duration(name, seconds):
+    """Record how long a named startup step took (e.g. model load)
+
+    Steps that finish after the first render are reported on their own line.
+    """
+    _durations[name] = seconds
+    if STARTUP_PROFILE and _reported:
+        _emit({'timestamp': time.time(), 'pid': os.getpid(), f'{name}_s': round(seconds, 4)})
+
+
+def report_startup():
+    """Print and append the startup timings, only once per process"""
+    global _reported
+    if not STARTUP_PROFILE or _reported or 'script_start' not in _marks:
+        return
+    _reported = True
+
+    start = _marks['script_start']
+    entry = {'timestamp': time.time(), 'pid': os.getpid()}
+    for name, t in sorted(_marks.items(), key=lambda item: item[1]):
+        if name != 'script_start':
+            entry[f'{name}_s'] = round(t - start, 4)
+    for name, seconds in _durations.items():
+        entry[f'{name}_s'] = round(seconds, 4)
+    _emit(entry)
+
+
+def _emit(entry):
+    print(f"Startup profile: {entry}")
+    try:
+        os.makedirs(os.path.dirname(STARTUP_PROFILE_PATH) or '.', exist_ok=True)
+        with open(STARTUP_PROFILE_PATH, 'a') as f:
+            f.write(json.dumps(entry) + "\n")
+    except Exception as e:
+        print(f"Startup profile write error: {e}")
@@ -0,0 +1,147 @@
+import os
+import re
+import time
+import threading
+
+from metrics import inc
+
+
+# Storage lifecycle configuration
+# directory -> (byte quota, max age in seconds); only files directly inside
+# each directory are managed. tmp/result_cache and tmp/catalog keep their own
+# budgets and are left alone.
+STORAGE_LIMITS = {
+    'tmp': (int(os.environ.get('TMP_QUOTA_BYTES', str(1024 * 1024 * 1024))), 24 * 3600),
+    os.path.join('tmp', 'normalized'): (int(os.environ.get('NORMALIZED_QUOTA_BYTES', str(512 * 1024 * 1024))), 24 * 3600),
+    os.path.join('tmp', 'thumbs'): (int(os.environ.get('THUMBS_QUOTA_BYTES', str(256 * 1024 * 1024))), 7 * 24 * 3600),
+    'static_files': (int(os.environ.get('STATIC_QUOTA_BYTES', str(512 * 1024 * 1024))), 6 * 3600),
+}
+STORAGE_SWEEP_INTERVAL_S = int(os.environ.get('STORAGE_SWEEP_INTERVAL_S', '300'))
+# Files younger than this are never evicted, covering jobs that are still
+# uploading, being fetched by the backend or writing their output
+STORAGE_MIN_AGE_S = int(os.environ.get('STORAGE_MIN_AGE_S', '600'))
+# How long a lease keeps a file alive without being refreshed
+LEASE_TTL_S = int(os.environ.get('LEASE_TTL_S', '1800'))
+# Files the app itself maintains in tmp/, including SQLite stores and their WAL files
+PROTECTED_SUFFIXES = ('.jsonl', '.prom', '.sqlite3', '.sqlite3-wal', '.sqlite3-shm')
+# directory -> pattern a file name must match to be managed at all. static_files
+# also holds operator-provided assets (tip1.jpg, tip2.jpg), so only the
+# upload copies named <client ip><time id>.jpg are ever evicted from it.
+STORAGE_NAME_PATTERNS = {
+    'static_files': re.compile(r'^[0-9A-Fa-f:]*\d{10,}\.jpg$'),
+}
+
+# absolute path -> lease expiry
+_leases = {}
+_leases_lock = threading.Lock()
+_sweeper_started = False
+
+
+def lease_files(paths, ttl_s=LEASE_TTL_S):
+    """Keep paths from being evicted for ttl_s seconds
+
+    Live sessions call this on every rerun for the files they still show or
+    will submit, so a lease lapses only after the session goes away.
+    """
+    expires_at = time.time() + ttl_s
+    with _leases_lock:
+        for path in paths:
+            if path and isinstance(path, str):
+                _leases[os.path.abspath(path)] = expires_at
+
+
+def _leased_paths(now):
+    with _leases_lock:
+        for path in [p for p, expires_at in _leases.items() if expires_at <= now]:
+            del _leases[path]
+        return set(_leases)
+
+
+def _list_files(directory):
+    """(path, size, last_used) for the managed regular files directly inside directory"""
+    name_pattern = STORAGE_NAME_PATTERNS.get(directory)
+    files = []
+    try:
+        entries = list(os.scandir(directory))
+    except FileNotFoundError:
+        return files
+    for entry in entries:
+        try:
+            if not entry.is_file(follow_symlinks=False) or entry.name.endswith(PROTECTED_SUFFIXES):
+                continue
+            if name_pattern is not None and not name_pattern.match(entry.name):
+                continue
+            stat = entry.stat(follow_symlinks=False)
+        except FileNotFoundError:
+            continue
+        # atime may not be updated (noatime/relatime), so never trust it below mtime
+        files.append((entry.path, stat.st_size, max(stat.st_atime, stat.st_mtime)))
+    return files
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+        return True
+    except FileNotFoundError:
+        return False
+    except OSError as e:
+        print(f"Storage evict error for {path}: {e}")
+        return False
+
+
+def sweep_directory(directory, max_bytes, max_age_s, now=None):
+    """Evict expired files, then least recently used ones down to max_bytes
+
+    Leased and recently written files are skipped. Returns (files, bytes) freed.
+    """
+    now = now or time.time()
+    leased = _leased_paths(now)
+    files = sorted(_list_files(directory), key=lambda f: f[2])
+    total = sum(size for _, size, _ in files)
+    freed_files = freed_bytes = 0
+
+    for path, size, last_used in files:
+        age = now - last_used
+        if total <= max_bytes and age <= max_age_s:
+            # Sorted oldest first, so nothing later is expired either
+            break
+        if age < STORAGE_MIN_AGE_S or os.path.abspath(path) in leased:
+            continue
+        if _remove(path):
+            total -= size
+            freed_files += 1
+            freed_bytes += size
+
+    if freed_files:
+        inc('storage_evicted_files_total', freed_files, directory=directory)
+        inc('storage_evicted_bytes_total', freed_bytes, directory=directory)
+    return freed_files, freed_bytes
+
+
+def sweep_once():
+    """Sweep every managed directory once"""
+    now = time.time()
+    for directory, (max_bytes, max_age_s) in STORAGE_LIMITS.items():
+        try:
+            freed_files, freed_bytes = sweep_directory(directory, max_bytes, max_age_s, now)
+            if freed_files:
+                print(f"Storage sweep: freed {freed_files} files ({freed_bytes} bytes) from {directory}")
+        except Exception as e:
+            print(f"Storage sweep error for {directory}: {e}")
+
+
+def _sweeper_loop():
+    while True:
+        sweep_once()
+        time.sleep(STORAGE_SWEEP_INTERVAL_S)
+
+
+def start_storage_sweeper():
+    """Start the background sweeper once per process"""
+    global _sweeper_started
+    with _leases_lock:
+        if _sweeper_started:
+            return
+        _sweeper_started = True
+    threading.Thread(target=_sweeper_loop, name="outfit-storage-sweeper", daemon=True).start()
@@ -0,0 +1,84 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+
+from PIL import Image, ImageOps
+
+
+# Thumbnail configuration
+THUMBNAIL_DIR = os.path.join("tmp", "thumbs")
+# Longest side in pixels for each preview bucket
+THUMBNAIL_BUCKETS = {
+    'xs': 160,
+    'sm': 320,
+    'md': 640,
+    'lg': 1024,
+}
+THUMBNAIL_QUALITY = 80
+HASH_MEMO_SIZE = 4096
+
+_hash_memo = OrderedDict()
+_hash_lock = threading.Lock()
+
+
+def file_sha1(path):
+    """SHA-1 of the file contents, memoized by (path, size, mtime)"""
+    stat = os.stat(path)
+    memo_key = (path, stat.st_size, stat.st_mtime_ns)
+    with _hash_lock:
+        digest = _hash_memo.get(memo_key)
+        if digest is not None:
+            _hash_memo.move_to_end(memo_key)
+            return digest
+
+    sha1 = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            sha1.update(chunk)
+    digest = sha1.hexdigest()
+
+    with _hash_lock:
+        _hash_memo[memo_key] = digest
+        while len(_hash_memo) > HASH_MEMO_SIZE:
+            _hash_memo.popitem(last=False)
+    return digest
+
+
+def thumbnail_path(content_hash, bucket):
+    """Where the preview for content_hash in bucket lives (it may not exist yet)"""
+    return os.path.join(THUMBNAIL_DIR, f"{content_hash}_{bucket}.jpg")
+
+
+def _render_thumbnail(src_path, dst_path, max_side):
+    with Image.open(src_path) as img:
+        # Let the JPEG decoder downscale by powers of two before the resize
+        img.draft('RGB', (max_side, max_side))
+        img = ImageOps.exif_transpose(img)
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        img.thumbnail((max_side, max_side), Image.LANCZOS)
+        os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+        tmp_path = f"{dst_path}.{threading.get_ident()}.tmp"
+        img.save(tmp_path, 'JPEG', quality=THUMBNAIL_QUALITY, optimize=True, progressive=True)
+    os.replace(tmp_path, dst_path)
+
+
+def get_thumbnail(src_path, bucket='md', content_hash=None):
+    """Return a cached preview of src_path no larger than the bucket size
+
+    Previews are generated once and keyed by the source's content hash, so
+    copies of the same image share one file. Falls back to src_path when the
+    source is not a local file or cannot be decoded.
+    """
+    if not src_path or not isinstance(src_path, str) or not os.path.isfile(src_path):
+        return src_path
+
+    try:
+        dst_path = thumbnail_path(content_hash or file_sha1(src_path), bucket)
+        if not os.path.exists(dst_path):
+            _render_thumbnail(src_path, dst_path, THUMBNAIL_BUCKETS[bucket])
+        return dst_path
+    except Exception as e:
+        print(f"Thumbnail error for {src_path}: {e}")
+        return src_path
@@ -1,15 +1,17 @@
 import os
-import sys
-import cv2
-import json
-import random
+import shutil
 import time
-import requests
-import func_timeout
-import numpy as np
-import streamlit as st
+import uuid
+import base64
+import hashlib
 from urllib.parse import urlparse
 
+from catalog import load_catalog, DEFAULT_TIER, PREMIUM_TIER
+from image_prep import prepare_upload_source
+from http_client import http_get, http_post, http_put, http_head
+from metrics import timed
+from region import is_ip_allowed
+
 
 # Configuration - Update these based on your storage solution
 # Option 1: Local storage (development)
@@ -30,12 +32,13 @@ R2_BUCKET_NAME = "your-bucket-name"
 TOKEN = os.environ.get('TOKEN', '')
 UKAPIURL = os.environ.get('UKAPIURL', '')
 POSEToken = os.environ.get('POSEToken', '')
-Regions = "IndiaPakistanBengal"
 
 # Project paths
 proj_dir = os.path.dirname(os.path.abspath(__file__))
 data_dir = os.path.join(proj_dir, 'Datas')
 tmpFolder = "tmp"
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+DOWNLOAD_MAX_BYTES = int(os.environ.get('DOWNLOAD_MAX_BYTES', str(50 * 1024 * 1024)))
 os.makedirs(tmpFolder, exist_ok=True)
 os.makedirs(LOCAL_STORAGE_PATH, exist_ok=True)
 
@@ -59,48 +62,24 @@ def get_tips():
 
 
 def get_cloth_examples(hr=0):
-    """Get clothing examples from local directory"""
-    cloth_dir = os.path.join(data_dir, 'ClothImgs')
-    examples = []
-    
-    if not os.path.exists(cloth_dir):
-        return examples
-    
-    files = sorted(os.listdir(cloth_dir))
-    hr_clothes = list(range(588, 597))
-    
-    for f in files:
-        if '.jpg' not in f and '.png' not in f:
-            continue
-        
-        cloth_id = f.split(".")[0]
-        if int(cloth_id) in hr_clothes and hr == 0:
-            continue
-        if int(cloth_id) not in hr_clothes and hr == 1:
-            continue
-        
-        cloth_path = os.path.join(cloth_dir, f)
-        examples.append(cloth_path)
-    
-    examples = examples[::-1]
-    return examples
+    """Get clothing examples of the standard (hr=0) or premium (hr=1) tier from the catalog index"""
+    catalog = load_catalog(os.path.join(data_dir, 'ClothImgs'))
+    return catalog['by_tier'].get(PREMIUM_TIER if hr == 1 else DEFAULT_TIER, ())
 
 
 def get_pose_examples():
-    """Get pose examples from local directory"""
-    pose_dir = os.path.join(data_dir, 'PoseImgs')
-    examples = []
-    
-    if not os.path.exists(pose_dir):
-        return examples
-    
-    for f in os.listdir(pose_dir):
-        if '.jpg' not in f and '.png' not in f:
-            continue
-        pose_path = os.path.join(pose_dir, f)
-        examples.append(pose_path)
-    
-    return examples
+    """Get pose examples from the catalog index"""
+    return load_catalog(os.path.join(data_dir, 'PoseImgs'))['paths']
+
+
+def get_cloth_hashes():
+    """Content hash of every clothing example, keyed by path"""
+    return load_catalog(os.path.join(data_dir, 'ClothImgs'))['hashes']
+
+
+def get_pose_hashes():
+    """Content hash of every pose example, keyed by path"""
+    return load_catalog(os.path.join(data_dir, 'PoseImgs'))['hashes']
 
 
 def get_client_ip():
@@ -126,7 +105,7 @@ def is_http_resource_accessible(url):
         if parsed.scheme not in ['http', 'https']:
             return False
         
-        response = requests.head(url, timeout=5, allow_redirects=True)
+        response = http_head('probe', url, allow_redirects=True)
         return response.status_code == 200
     except Exception as e:
         print(f"Error checking resource accessibility: {e}")
@@ -185,7 +164,8 @@ def upload_to_imgur(file_path):
         
         headers = {'Authorization': f'Client-ID {client_id}'}
         with open(file_path, 'rb') as f:
-            response = requests.post(
+            response = http_post(
+                'imgur',
                 'https://api.imgur.com/3/image',
                 headers=headers,
                 files={'image': f}
@@ -199,14 +179,18 @@ def upload_to_imgur(file_path):
         return ""
 
 
+@timed('upload')
 def upload_pose_img(clientIp, timeId, img):
     """Upload pose image to storage service"""
     fileName = clientIp.replace(".", "") + str(timeId) + ".jpg"
     local_path = os.path.join(tmpFolder, fileName)
     
-    # Read and save image locally first
-    img_data = cv2.imread(img)
-    cv2.imwrite(local_path, img_data)
+    # Upload the original bytes when possible; transcode only if needed
+    try:
+        source_path, transcoded = prepare_upload_source(img, local_path)
+    except Exception as e:
+        print(f"Upload prepare error: {e}")
+        return ""
     
     # Choose upload method based on configuration
     upload_url = ""
@@ -215,14 +199,14 @@ def upload_pose_img(clientIp, timeId, img):
         # For local development, use Streamlit's file serving
         # Copy to static folder
         static_path = os.path.join(LOCAL_STORAGE_PATH, fileName)
-        cv2.imwrite(static_path, img_data)
+        shutil.copyfile(source_path, static_path)
         upload_url = static_path  # Return local path
     
     elif USE_S3:
-        upload_url = upload_to_s3(local_path, fileName)
+        upload_url = upload_to_s3(source_path, fileName)
     
     elif USE_R2:
-        upload_url = upload_to_r2(local_path, fileName)
+        upload_url = upload_to_r2(source_path, fileName)
     
     else:
         # Use original API upload (if available)
@@ -234,36 +218,39 @@ def upload_pose_img(clientIp, timeId, img):
             "cloud": "ali"
         }
         
-        session = requests.session()
         try:
-            ret = requests.post(
+            ret = http_post(
+                'upload',
                 f"{UKAPIURL}/upload",
                 headers={'Content-Type': 'application/json'},
-                json=json_data,
-                timeout=30
+                json=json_data
             )
             
             if ret.status_code == 200:
                 if 'upload1' in ret.json():
                     upload_url_endpoint = ret.json()['upload1']
                     headers = {'Content-Type': 'image/jpeg'}
-                    response = session.put(
-                        upload_url_endpoint,
-                        data=open(local_path, 'rb').read(),
-                        headers=headers
-                    )
+                    # Stream the body from disk instead of reading it into memory
+                    with open(source_path, 'rb') as f:
+                        response = http_put(
+                            'storage_put',
+                            upload_url_endpoint,
+                            data=f,
+                            headers=headers
+                        )
                     if response.status_code == 200:
                         upload_url = upload_url_endpoint
         except Exception as e:
             print(f"Upload error: {e}")
     
     # Clean up temporary file
-    if os.path.exists(local_path) and not USE_LOCAL_STORAGE:
+    if transcoded and os.path.exists(local_path):
         os.remove(local_path)
     
     return upload_url
 
 
+@timed('submit')
 def publicClothSwap(image, clothId, is_hr=0):
     """Submit cloth swap task to API"""
     json_data = {
@@ -283,11 +270,11 @@ def publicClothSwap(image, clothId, is_hr=0):
     }
     
     try:
-        ret = requests.post(
+        ret = http_post(
+            'public_advton',
             f'{UKAPIURL}/public_advton',
             headers=headers,
-            json=json_data,
-            timeout=30
+            json=json_data
         )
         
         if ret.status_code == 200:
@@ -310,11 +297,11 @@ def getInfRes(taskId):
     json_data = {'id': taskId}
     
     try:
-        ret = requests.post(
+        ret = http_post(
+            'status_advton',
             f'{UKAPIURL}/status_advton',
             headers=headers,
-            json=json_data,
-            timeout=10
+            json=json_data
         )
         
         if ret.status_code == 200:
@@ -327,23 +314,12 @@ def getInfRes(taskId):
         return None
 
 
-@func_timeout.func_set_timeout(10)
 def check_region(ip):
     """Check if IP is from restricted region"""
-    try:
-        ret = requests.get(f"https://realip.cc/?ip={ip}", timeout=5)
-        nat = ret.json()['country'].lower()
-        if nat in Regions.lower():
-            print(nat, 'invalid', ip)
-            return False
-        else:
-            print(nat, 'valid', ip)
-        return True
-    except Exception as e:
-        print(f"Region check error: {e}")
-        return True
+    return is_ip_allowed(ip)
 
 
+@timed('region_check')
 def check_region_warp(ip):
     """Wrapper for region check with error handling"""
     try:
@@ -353,6 +329,7 @@ def check_region_warp(ip):
         return True
 
 
+@timed('submit')
 def public_pose_changer(image_url, prompt="Change the pose: two hands on hips.#Change the pose: arms extended."):
     """Submit pose change request to API"""
     headers = {
@@ -372,11 +349,11 @@ def public_pose_changer(image_url, prompt="Change the pose: two hands on hips.#C
     }
     
     try:
-        ret = requests.post(
+        ret = http_post(
+            'public_comfyui',
             f'{UKAPIURL}/public_comfyui',
             headers=headers,
-            json=json_data,
-            timeout=30
+            json=json_data
         )
         
         if ret.status_code == 200:
@@ -394,11 +371,11 @@ def get_pose_changer_res(task_id):
     headers = {'Content-Type': 'application/json'}
     
     try:
-        ret = requests.post(
+        ret = http_post(
+            'status_comfyui',
             f'{UKAPIURL}/status_comfyui',
             headers=headers,
-            json={'id': task_id},
-            timeout=10
+            json={'id': task_id}
         )
         
         if ret.status_code == 200:
@@ -409,20 +386,53 @@ def get_pose_changer_res(task_id):
         return None
 
 
+@timed('download')
 def download_result_image(image_url, filename=None):
-    """Download result image from URL and save locally"""
+    """Download result image from URL and save locally
+
+    The body is streamed to a .part file in chunks (so memory stays flat for
+    large HR outputs), checked against Content-Length and Content-MD5 when
+    the server sends them, and renamed into place only once complete.
+    """
+    part_path = None
     try:
         if filename is None:
-            filename = f"result_{int(time.time())}.jpg"
+            filename = f"result_{int(time.time())}_{uuid.uuid4().hex[:8]}.jpg"
         
         local_path = os.path.join(tmpFolder, filename)
         
-        response = requests.get(image_url, timeout=30)
-        if response.status_code == 200:
-            with open(local_path, 'wb') as f:
-                f.write(response.content)
-            return local_path
-        return None
+        with http_get('download', image_url, stream=True) as response:
+            if response.status_code != 200:
+                return None
+            
+            expected_size = response.headers.get('Content-Length')
+            if expected_size is not None and int(expected_size) > DOWNLOAD_MAX_BYTES:
+                print(f"Download result image error: {expected_size} bytes exceeds the limit")
+                return None
+            
+            md5 = hashlib.md5()
+            size = 0
+            part_path = f"{local_path}.{uuid.uuid4().hex[:8]}.part"
+            with open(part_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > DOWNLOAD_MAX_BYTES:
+                        raise ValueError(f"download exceeds {DOWNLOAD_MAX_BYTES} bytes")
+                    md5.update(chunk)
+                    f.write(chunk)
+            
+            # Both headers describe the encoded body, so only check identity-encoded responses
+            if not response.headers.get('Content-Encoding'):
+                if expected_size is not None and size != int(expected_size):
+                    raise ValueError(f"truncated download: {size} of {expected_size} bytes")
+                content_md5 = response.headers.get('Content-MD5')
+                if content_md5 and base64.b64encode(md5.digest()).decode("ascii") != content_md5.strip():
+                    raise ValueError("Content-MD5 mismatch")
+        
+        os.replace(part_path, local_path)
+        return local_path
     except Exception as e:
         print(f"Download result image error: {e}")
-        return None
\ No newline at end of file
+        if part_path and os.path.exists(part_path):
+            os.remove(part_path)
+        return None